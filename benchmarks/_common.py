@@ -0,0 +1,130 @@
+"""Shared plumbing for the PENG benchmarks.
+
+Every benchmark imports ``core`` from ``--src`` (the working tree by default)
+and can re-run itself against the ``src/`` of another git revision with
+``--rev`` so before/after numbers come from the same script.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+
+
+def arg_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--src", default=SRC, help="src/ tree to import core from.")
+    parser.add_argument("--rev", help="Also run against the src/ tree of this git revision.")
+    return parser
+
+
+def setup(args):
+    """Runs the ``--rev`` comparison if asked, then puts ``--src`` on sys.path."""
+    if args.rev:
+        print(f"== {args.rev} ==")
+        run_at_rev(args.rev)
+        print("== working tree ==")
+    sys.path.insert(0, os.path.abspath(args.src))
+
+
+def run_at_rev(rev):
+    argv = []
+    skip = False
+    for arg in sys.argv[1:]:
+        if skip:
+            skip = False
+        elif arg in ("--rev", "--src"):
+            skip = True
+        elif not arg.startswith(("--rev=", "--src=")):
+            argv.append(arg)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        subprocess.run(
+            [sys.executable, os.path.abspath(sys.argv[0]), "--src", extract_src(rev, tmp), *argv],
+            check=True
+        )
+
+
+def extract_src(rev, directory):
+    """Writes the ``src/`` tree of git revision ``rev`` into ``directory``, returns its path."""
+    archive = subprocess.run(
+        ["git", "-C", ROOT, "archive", rev, "src"],
+        check=True, stdout=subprocess.PIPE
+    ).stdout
+    subprocess.run(["tar", "-x", "-C", directory], input=archive, check=True)
+    return os.path.join(directory, "src")
+
+
+def best_of(func, repeat=5):
+    """Returns the fastest wall time of ``repeat`` calls and the last result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def context_factory(ast):
+    """Returns a function making fresh ``<main>`` Contexts to run ``ast`` in.
+
+    On trees that have a Resolver, ``ast`` is resolved once here and every
+    Context shares the resulting slots.
+    """
+    from core.interpreter import Context, SymbolTable
+
+    try:
+        from core.resolver import Resolver
+    except ImportError:
+        def new_context():
+            context = Context("<main>")
+            context.symbol_table = SymbolTable()
+            return context
+        return new_context
+
+    resolved = Context("<main>")
+    resolved.symbol_table = SymbolTable()
+    Resolver(resolved).resolve(ast)
+
+    def new_context():
+        context = Context("<main>")
+        context.symbol_table = resolved.symbol_table
+        context.grow_frame(len(resolved.frame))
+        return context
+    return new_context
+
+
+def count_nodes(ast):
+    """Number of nodes in ``ast``, without recursing (deep trees welcome)."""
+    count = 0
+    stack = [ast]
+    while stack:
+        node = stack.pop()
+        count += 1
+        for attr in ("left", "right", "node"):
+            child = getattr(node, attr, None)
+            if child is not None:
+                stack.append(child)
+        for attr in ("nodes", "statements"):
+            stack.extend(getattr(node, attr, ()))
+    return count
+
+
+def engines():
+    """Returns {name: engine class} for every engine of the tree under test.
+
+    Older trees have no ``ENGINES`` (only the tree walker) or map names to
+    classes directly instead of loading them through ``get_engine``.
+    """
+    import peng
+
+    if not hasattr(peng, "ENGINES"):
+        return {"tree": peng.Interpreter}
+    if hasattr(peng, "get_engine"):
+        return {name: peng.get_engine(name) for name in peng.ENGINES}
+    return dict(peng.ENGINES)
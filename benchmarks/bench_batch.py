@@ -0,0 +1,76 @@
+"""``peng.py -j N`` over a corpus of CPU-bound scripts, against a process per script.
+
+Reports scripts/sec for every ``--jobs`` count and the speedup over
+``-j 1``, which should come close to N on a machine with N free cores.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from _common import arg_parser, setup
+from generators import arithmetic_heavy
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--scripts", type=int, default=200)
+    parser.add_argument("--lines", type=int, default=200, help="Statements per script.")
+    parser.add_argument("--jobs", default=None,
+                        help="Comma-separated worker counts (default: 1 and every doubling up to the cores).")
+    args = parser.parse_args()
+    setup(args)
+
+    cores = os.cpu_count() or 1
+    if args.jobs:
+        jobs = [int(n) for n in args.jobs.split(",")]
+    else:
+        jobs = [1]
+        while jobs[-1] * 2 <= cores:
+            jobs.append(jobs[-1] * 2)
+        if jobs[-1] != cores:
+            jobs.append(cores)
+
+    peng = os.path.join(os.path.abspath(args.src), "peng.py")
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for i in range(args.scripts):
+            files.append(os.path.join(tmp, f"script{i}.peng"))
+            with open(files[-1], "w") as f:
+                f.write(arithmetic_heavy(args.lines) + f'say "done", {i}\n')
+        # Every run parses, where the first would otherwise write the caches
+        # the others read.
+        usage = subprocess.run([sys.executable, peng, "--help"], stdout=subprocess.PIPE, text=True).stdout
+        options = ["--no-cache"] if "--no-cache" in usage else []
+
+        def timed(argv):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, peng, *options, *argv], stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL, check=True)
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        for file_name in files:
+            timed([file_name])
+        report("process per script", args.scripts, time.perf_counter() - start)
+
+        import peng as module
+        if not hasattr(module, "run_file"):
+            print("no -j in this tree")
+            return
+
+        base = None
+        for n in jobs:
+            elapsed = timed(["-j", str(n), *files])
+            base = base or elapsed
+            report(f"-j {n}", args.scripts, elapsed, f", {base / elapsed:.2f}x -j 1")
+        print(f"({cores} cores)")
+
+
+def report(name, scripts, elapsed, extra=""):
+    print(f"{name:>18}: {scripts} scripts in {elapsed:.3f}s ({scripts / elapsed:,.1f} scripts/sec{extra})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Tree walker run time with and without an execution Budget.
+
+The budget's limits are all set, high enough never to be reached, so the
+difference is what the checks cost a script that stays within them.
+"""
+import contextlib
+import io
+
+from _common import arg_parser, best_of, context_factory, setup
+from generators import assignment_chain, print_heavy
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--lines", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    setup(args)
+
+    from core.interpreter import Interpreter
+    from core.lexer import Lexer
+    from core.parser import Parser
+
+    variants = {"no budget": lambda source: Interpreter(source)}
+    try:
+        from core.budget import Budget
+    except ImportError:
+        pass
+    else:
+        budget = Budget(max_nodes=10**9, max_string_length=10**9, max_output=10**9, time_limit=3600)
+        variants["budget"] = lambda source: Interpreter(source, budget=budget)
+
+    for shape, generator in (("assignments", assignment_chain), ("print", print_heavy)):
+        lexer = Lexer(generator(args.lines), "<bench>")
+        ast = Parser(lexer.lex(), lexer.source).parse()
+        new_context = context_factory(ast)
+
+        base = None
+        for name, make in variants.items():
+            def run():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    make(lexer.source).interpret(ast, new_context())
+
+            elapsed, _ = best_of(run, args.repeat)
+            base = base or elapsed
+            print(f"{shape:>12} {name:>9}: {args.lines} statements in {elapsed:.3f}s "
+                  f"({args.lines / elapsed:,.0f} statements/sec, {elapsed / base:.2f}x no budget)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Tree walker cost per term of long `a + b - c * d ...` chains.
+
+A chain parses to a left-deep tree as deep as it is long. Chains longer
+than the recursion limit are reported as such by trees that recurse on
+them, in whichever stage does.
+"""
+import contextlib
+import io
+
+from _common import arg_parser, best_of, context_factory, setup
+
+
+def chain(terms):
+    names = ["a", "b", "c", "1", "2.5"]
+    ops = ["+", "-", "+", "*"]
+    expr = " ".join(f"{names[i % len(names)]} {ops[i % len(ops)]}" for i in range(terms - 1))
+    return f"a is 3\nb is 4\nc is 0.5\ntotal is {expr} {names[(terms - 1) % len(names)]}\nsay total\n"
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--terms", default="100,1000,10000,100000",
+                        help="Comma-separated chain lengths.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    setup(args)
+
+    from core.interpreter import Interpreter
+    from core.lexer import Lexer
+    from core.parser import Parser
+
+    for terms in map(int, args.terms.split(",")):
+        try:
+            lexer = Lexer(chain(terms), "<bench>")
+            ast = Parser(lexer.lex(), lexer.source).parse()
+            new_context = context_factory(ast)
+
+            def run():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    return Interpreter(lexer.source).interpret(ast, new_context())
+
+            elapsed, res = best_of(run, args.repeat)
+        except RecursionError:
+            print(f"{terms:>8} terms: RecursionError")
+            continue
+        print(f"{terms:>8} terms: {elapsed * 1e3:8.3f}ms ({elapsed / terms * 1e9:,.0f} ns/term)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Requests/sec of ``peng.py --serve`` against a cold ``peng.py`` per script.
+
+Runs a one-line script ``--requests`` times as a new process, through
+``peng.py --client`` processes and through ``core.client.request`` from this
+process with ``--concurrency`` requests in flight, which is the cost a
+long-lived caller pays without the client's interpreter start.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _common import arg_parser, setup
+
+
+def rate(name, requests, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{name:>22}: {requests} requests in {elapsed:.3f}s ({requests / elapsed:,.1f} requests/sec)")
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    setup(args)
+
+    peng = os.path.join(os.path.abspath(args.src), "peng.py")
+    subprocess.run([sys.executable, "-m", "compileall", "-q", os.path.dirname(peng)], check=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        script = os.path.join(tmp, "tiny.peng")
+        with open(script, "w") as f:
+            f.write('x is 6 * 7\nsay "answer", x\n')
+
+        def run_processes(*argv):
+            for _ in range(args.requests):
+                subprocess.run([sys.executable, peng, *argv, script], stdout=subprocess.DEVNULL, check=True)
+
+        rate("cold process", args.requests, run_processes)
+
+        try:
+            from core.client import request
+        except ImportError:
+            print("no --serve in this tree")
+            return
+
+        sock = os.path.join(tmp, "peng.sock")
+        server = subprocess.Popen([sys.executable, peng, "--serve", sock])
+        try:
+            devnull = os.open(os.devnull, os.O_RDWR)
+            while True:
+                try:
+                    request(sock, ["--version"], fds=(devnull, devnull, devnull))
+                    break
+                except OSError:
+                    time.sleep(0.01)
+
+            rate("client process", args.requests, lambda: run_processes("--client", sock))
+
+            def send(_):
+                status, error = request(sock, [script], fds=(devnull, devnull, devnull))
+                assert status == 0, error
+
+            rate("request, sequential", args.requests, lambda: list(map(send, range(args.requests))))
+            with ThreadPoolExecutor(args.concurrency) as pool:
+                rate(f"request, {args.concurrency} in flight", args.requests,
+                     lambda: list(pool.map(send, range(args.requests))))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
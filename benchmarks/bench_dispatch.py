@@ -0,0 +1,32 @@
+"""Tree walker cost per visited node, dispatch and error handling included."""
+from _common import arg_parser, best_of, context_factory, count_nodes, setup
+from generators import arithmetic_heavy
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--lines", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    setup(args)
+
+    from core.interpreter import Interpreter
+    from core.lexer import Lexer
+    from core.parser import Parser
+
+    # Not optimized, so every node of the generated expressions is visited.
+    lexer = Lexer(arithmetic_heavy(args.lines), "<bench>")
+    ast = Parser(lexer.lex(), lexer.source).parse()
+    nodes = count_nodes(ast)
+    new_context = context_factory(ast)
+
+    def run():
+        Interpreter(lexer.source).interpret(ast, new_context())
+
+    elapsed, _ = best_of(run, args.repeat)
+    print(f"dispatch: {nodes} nodes in {elapsed:.3f}s "
+          f"({elapsed / nodes * 1e9:,.0f} ns/node)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Execution engines compared on arithmetic- and print-heavy scripts."""
+import contextlib
+import io
+
+from _common import arg_parser, best_of, context_factory, engines as load_engines, setup
+from generators import arithmetic_heavy, print_heavy
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--lines", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    setup(args)
+
+    engines = load_engines()
+    from core.lexer import Lexer
+    from core.parser import Parser
+
+    for name, generator in (("arithmetic", arithmetic_heavy), ("print", print_heavy)):
+        code = generator(args.lines)
+        lexer = Lexer(code, "<bench>")
+        ast = Parser(lexer.lex(), lexer.source).parse()
+        new_context = context_factory(ast)
+
+        for engine, engine_class in engines.items():
+            def run():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    engine_class(lexer.source).interpret(ast, new_context())
+
+            elapsed, _ = best_of(run, args.repeat)
+            report(name, engine, args.lines, elapsed)
+
+        # Engines that compile first: time the compile and the run separately.
+        staged = []
+        if "vm" in engines:
+            from core.compiler import Compiler
+            staged.append(("vm", Compiler().compile, lambda vm, compiled: vm.run(compiled, None)))
+        if "python" in engines:
+            from core.transpiler import Transpiler
+            staged.append(("python", Transpiler().transpile, lambda engine, compiled: engine.run(*compiled, None)))
+
+        for engine, compile_ast, run_compiled in staged:
+            compile_time, compiled = best_of(lambda: compile_ast(ast), args.repeat)
+
+            def run():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    run_compiled(engines[engine](lexer.source), compiled)
+
+            run_time, _ = best_of(run, args.repeat)
+            report(name, f"{engine} compile", args.lines, compile_time)
+            report(name, f"{engine} run", args.lines, run_time)
+
+
+def report(name, engine, statements, elapsed):
+    print(f"{name:>10} {engine:>14}: {statements} statements in {elapsed:.3f}s "
+          f"({statements / elapsed:,.0f} statements/sec)")
+
+
+if __name__ == "__main__":
+    main()
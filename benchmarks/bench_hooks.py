@@ -0,0 +1,48 @@
+"""Tree walker run time without hooks, with no-op Hooks and with a TraceRecorder."""
+import contextlib
+import io
+
+from _common import arg_parser, best_of, context_factory, setup
+from generators import assignment_chain
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--lines", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    setup(args)
+
+    from core.interpreter import Interpreter
+    from core.lexer import Lexer
+    from core.parser import Parser
+
+    try:
+        from core.hooks import Hooks, TraceRecorder
+    except ImportError:
+        variants = {"no hooks": lambda source: Interpreter(source)}
+    else:
+        variants = {
+            "no hooks": lambda source: Interpreter(source),
+            "no-op Hooks": lambda source: Interpreter(source, None, Hooks()),
+            "TraceRecorder": lambda source: Interpreter(source, None, TraceRecorder()),
+        }
+
+    lexer = Lexer(assignment_chain(args.lines), "<bench>")
+    ast = Parser(lexer.lex(), lexer.source).parse()
+    new_context = context_factory(ast)
+
+    base = None
+    for name, make in variants.items():
+        def run():
+            with contextlib.redirect_stdout(io.StringIO()):
+                make(lexer.source).interpret(ast, new_context())
+
+        elapsed, _ = best_of(run, args.repeat)
+        base = base or elapsed
+        print(f"{name:>14}: {args.lines} statements in {elapsed:.3f}s "
+              f"({args.lines / elapsed:,.0f} statements/sec, {elapsed / base:.2f}x no hooks)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""Lexer throughput in tokens/sec."""
+from _common import arg_parser, best_of, setup
+from generators import assignment_chain
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    setup(args)
+
+    from core.lexer import Lexer
+
+    code = assignment_chain(args.lines)
+    elapsed, tokens = best_of(lambda: Lexer(code, "<bench>").lex(), args.repeat)
+    print(f"lex: {args.lines} lines, {len(tokens)} tokens in {elapsed:.3f}s "
+          f"({len(tokens) / elapsed:,.0f} tokens/sec)")
+
+
+if __name__ == "__main__":
+    main()
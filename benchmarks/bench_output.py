@@ -0,0 +1,63 @@
+"""Running a print-heavy script with its output going to a file.
+
+Trees without output sinks print through ``print()``, that is the "print" row
+to compare the sinks of the working tree against (``--rev``).
+"""
+import contextlib
+import os
+import tempfile
+
+from _common import arg_parser, best_of, context_factory, engines, setup
+from generators import print_heavy
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--engine", default="tree")
+    parser.add_argument("--width", type=int, default=2, help="Values per say statement.")
+    args = parser.parse_args()
+    setup(args)
+
+    from core.lexer import Lexer
+    from core.parser import Parser
+
+    engine_class = engines()[args.engine]
+    lexer = Lexer(print_heavy(args.lines, args.width), "<bench>")
+    ast = Parser(lexer.lex(), lexer.source).parse()
+    new_context = context_factory(ast)
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.path.join(tmp, "out.txt"), "w") as out:
+        try:
+            from core.output import CaptureSink, FdSink, StreamSink
+        except ImportError:
+            sinks = [("print", lambda: None)]
+        else:
+            sinks = [
+                ("every line", lambda: StreamSink(out, 0)),
+                ("buffered", lambda: StreamSink(out)),
+                ("fd", lambda: FdSink(out.fileno())),
+                ("capture", CaptureSink),
+            ]
+
+        for name, make_sink in sinks:
+            def run():
+                out.seek(0)
+                out.truncate()
+                with contextlib.redirect_stdout(out):
+                    sink = make_sink()
+                    if sink is None:
+                        engine_class(lexer.source).interpret(ast, new_context())
+                    else:
+                        engine_class(lexer.source, sink).interpret(ast, new_context())
+                        sink.close()
+                out.flush()
+
+            elapsed, _ = best_of(run, args.repeat)
+            print(f"{name:>10}: {args.lines} say statements in {elapsed:.3f}s "
+                  f"({args.lines / elapsed:,.0f} lines/sec)")
+
+
+if __name__ == "__main__":
+    main()
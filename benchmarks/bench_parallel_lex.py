@@ -0,0 +1,74 @@
+"""``Lexer.iter_tokens_parallel`` on a multi-hundred-MB generated script, per worker count.
+
+Reports MB/sec and tokens/sec for every ``--jobs`` count and the speedup
+over one job, which lexes the same chunks in the benchmark's own process.
+Tokens are counted as they come and dropped, as a whole token list of a
+script this size would not fit in memory; for the same reason a plain
+``Lexer.lex`` is only run with ``--sequential``. The workers only lex:
+the Tokens are made again in this process, so the speedup levels off
+below the number of cores.
+"""
+import os
+import time
+
+from _common import arg_parser, setup
+from generators import arithmetic_heavy
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--mb", type=float, default=200, help="Size of the script in MB (default: 200).")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Characters per chunk (default: the lexer's).")
+    parser.add_argument("--jobs", default=None,
+                        help="Comma-separated worker counts (default: 1 and every doubling up to the cores).")
+    parser.add_argument("--sequential", action="store_true", help="Also time Lexer.lex on the whole script.")
+    args = parser.parse_args()
+    setup(args)
+
+    from core.lexer import Lexer
+
+    if not hasattr(Lexer, "iter_tokens_parallel"):
+        print("no parallel lexing in this tree")
+        return
+
+    cores = os.cpu_count() or 1
+    if args.jobs:
+        jobs = [int(n) for n in args.jobs.split(",")]
+    else:
+        jobs = [1]
+        while jobs[-1] * 2 <= cores:
+            jobs.append(jobs[-1] * 2)
+        if jobs[-1] != cores:
+            jobs.append(cores)
+
+    # A block of whole lines repeated, which is much faster than generating
+    # the whole script and lexes the same.
+    block = arithmetic_heavy(10_000)
+    code = block * max(1, round(args.mb * 1e6 / len(block)))
+    mb = len(code) / 1e6
+    options = {} if args.chunk_size is None else {"chunk_size": args.chunk_size}
+
+    if args.sequential:
+        start = time.perf_counter()
+        tokens = len(Lexer(code, "<bench>").lex())
+        report("Lexer.lex", mb, tokens, time.perf_counter() - start)
+
+    base = None
+    for n in jobs:
+        start = time.perf_counter()
+        tokens = 0
+        for _ in Lexer(code, "<bench>").iter_tokens_parallel(n, **options):
+            tokens += 1
+        elapsed = time.perf_counter() - start
+        base = base or elapsed
+        report(f"{n} {'job' if n == 1 else 'jobs'}", mb, tokens, elapsed, f", {base / elapsed:.2f}x 1 job")
+    print(f"({cores} cores)")
+
+
+def report(name, mb, tokens, elapsed, extra=""):
+    print(f"{name:>10}: {mb:,.1f} MB, {tokens:,} tokens in {elapsed:.3f}s "
+          f"({mb / elapsed:,.2f} MB/sec, {tokens / elapsed:,.0f} tokens/sec{extra})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Parser throughput on long flat expressions and on deeply nested ones.
+
+Reports tokens/sec and nodes/sec for ``Parser.parse`` alone, the tokens
+lexed beforehand. Nesting deeper than the recursion limit is reported as
+such by trees whose parser recurses.
+"""
+from _common import arg_parser, best_of, count_nodes, setup
+from generators import arithmetic_heavy, deep_parens
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--lines", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--depth", type=int, default=50_000, help="Parentheses around the one deep expression.")
+    args = parser.parse_args()
+    setup(args)
+
+    from core.lexer import Lexer
+    from core.parser import Parser
+
+    shapes = {
+        "long (48 terms)": arithmetic_heavy(args.lines, terms=48),
+        "nested (32 deep)": deep_parens(args.lines, depth=32),
+        f"parens ({args.depth} deep)": "x is " + "(" * args.depth + "1" + ")" * args.depth + "\n",
+    }
+    for name, code in shapes.items():
+        lexer = Lexer(code, "<bench>")
+        tokens = lexer.lex()
+
+        try:
+            elapsed, ast = best_of(lambda: Parser(tokens, lexer.source).parse(), args.repeat)
+        except RecursionError:
+            print(f"{name:>20}: RecursionError")
+            continue
+        nodes = count_nodes(ast)
+        print(f"{name:>20}: {len(tokens)} tokens, {nodes} nodes in {elapsed:.3f}s "
+              f"({len(tokens) / elapsed:,.0f} tokens/sec, {nodes / elapsed:,.0f} nodes/sec)")
+
+
+if __name__ == "__main__":
+    main()
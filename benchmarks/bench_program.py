@@ -0,0 +1,51 @@
+"""Runs/sec of a program compiled once with ``peng.compile`` against ``compile_and_run``.
+
+The script is a small generated one, like those a service would evaluate
+per request; ``compile_and_run`` lexes, parses and compiles it every time.
+"""
+import contextlib
+import io
+
+from _common import arg_parser, best_of, engines, setup
+from generators import assignment_chain
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--lines", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    setup(args)
+
+    import peng
+    from core.output import CaptureSink
+
+    code = assignment_chain(args.lines)
+    for engine in engines():
+        def compile_and_run():
+            with contextlib.redirect_stdout(io.StringIO()):
+                for _ in range(args.runs):
+                    peng.compile_and_run(code, "<bench>", engine, output=CaptureSink())
+
+        elapsed, _ = best_of(compile_and_run, args.repeat)
+        report(engine, "compile_and_run", args.runs, elapsed)
+
+        if not hasattr(peng, "compile"):
+            continue
+        program = peng.compile(code, "<bench>", engine)
+
+        def run():
+            for _ in range(args.runs):
+                program.run()
+
+        elapsed, _ = best_of(run, args.repeat)
+        report(engine, "Program.run", args.runs, elapsed)
+
+
+def report(engine, name, runs, elapsed):
+    print(f"{engine:>6} {name:>15}: {runs} runs in {elapsed:.3f}s ({runs / elapsed:,.0f} runs/sec)")
+
+
+if __name__ == "__main__":
+    main()
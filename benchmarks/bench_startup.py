@@ -0,0 +1,79 @@
+"""Startup cost of ``peng.py file.peng`` on a one-line script.
+
+Runs the script under ``python -X importtime`` and adds up the cumulative
+time of every top-level import that a bare interpreter (``python -c pass``)
+does not make, i.e. what loading PENG itself costs. Bytecode is compiled
+first so the numbers do not include compiling the sources.
+
+Exits with status 1 when the working tree's import time is above
+``--max-import-ms``, so the benchmark can guard against startup regressions
+(a ``--rev`` run only reports).
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from _common import SRC, arg_parser, setup
+
+
+def import_times(argv):
+    """Returns {top-level module: cumulative import microseconds} for ``argv``."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True
+    ).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        # Nested imports are indented under the module that made them.
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--max-import-ms", type=float, default=10.0,
+                        help="Fail when importing PENG takes longer than this (best run).")
+    args = parser.parse_args()
+    setup(args)
+
+    peng = os.path.join(os.path.abspath(args.src), "peng.py")
+    subprocess.run([sys.executable, "-m", "compileall", "-q", os.path.dirname(peng)], check=True)
+    baseline = set(import_times(["-c", "pass"]))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        script = os.path.join(tmp, "tiny.peng")
+        with open(script, "w") as f:
+            f.write('say "hello"\n')
+        # Parses once so every timed run is a cache hit, where trees have a cache.
+        subprocess.run([sys.executable, peng, script], stdout=subprocess.DEVNULL, check=True)
+
+        best_import = best_wall = float("inf")
+        slowest = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            times = import_times([peng, script])
+            best_wall = min(best_wall, time.perf_counter() - start)
+            total = sum(us for name, us in times.items() if name not in baseline)
+            if total < best_import:
+                best_import = total
+                slowest = sorted(((us, name) for name, us in times.items() if name not in baseline), reverse=True)
+
+    print(f"startup: imports {best_import / 1000:.1f}ms, wall {best_wall * 1000:.1f}ms "
+          f"(best of {args.repeat})")
+    for us, name in slowest[:5]:
+        print(f"{name:>24}: {us / 1000:.1f}ms")
+
+    if os.path.abspath(args.src) == SRC and best_import / 1000 > args.max_import_ms:
+        print(f"startup regressed: imports take over {args.max_import_ms}ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
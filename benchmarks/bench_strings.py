@@ -0,0 +1,44 @@
+"""Tree walker growing one string by concatenation, at increasing lengths.
+
+Linear scaling shows as a flat ns/append column.
+"""
+import contextlib
+
+from _common import arg_parser, best_of, context_factory, setup
+from generators import concat_chain
+
+
+class Discard:
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--sizes", default="10000,20000,40000,80000", help="Comma separated statement counts.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    setup(args)
+
+    from core.interpreter import Interpreter
+    from core.lexer import Lexer
+    from core.parser import Parser
+
+    for lines in map(int, args.sizes.split(",")):
+        lexer = Lexer(concat_chain(lines), "<bench>")
+        ast = Parser(lexer.lex(), lexer.source).parse()
+        new_context = context_factory(ast)
+
+        def run():
+            with contextlib.redirect_stdout(Discard()):
+                Interpreter(lexer.source).interpret(ast, new_context())
+
+        elapsed, _ = best_of(run, args.repeat)
+        print(f"concat: {lines:>7} appends in {elapsed:.3f}s ({elapsed / lines * 1e9:,.0f} ns/append)")
+
+
+if __name__ == "__main__":
+    main()
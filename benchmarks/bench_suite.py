@@ -0,0 +1,144 @@
+"""Lexer, parser and tree walker throughput and peak memory over program shapes.
+
+Every shape is generated at ``--lines`` statements, then ``Lexer.lex``,
+``Parser.parse`` and ``Interpreter.interpret`` are timed on their own and
+reported in tokens/sec, nodes/sec and statements/sec, with the peak memory
+each allocates (traced in a separate, untimed run). ``--json`` stores the
+results, ``--baseline`` compares them against ones stored before and exits
+with status 1 if a throughput fell, or a peak grew, by more than
+``--threshold`` percent::
+
+    python bench_suite.py --json baseline.json
+    ... change something ...
+    python bench_suite.py --baseline baseline.json
+"""
+import contextlib
+import gc
+import json
+import os
+import platform
+import sys
+import tracemalloc
+
+from _common import arg_parser, best_of, context_factory, count_nodes, setup
+from generators import assignment_chain, concat_chain, deep_parens, print_heavy, variable_heavy
+
+SHAPES = {
+    "assignments": assignment_chain,
+    "deep_parens": lambda lines: deep_parens(lines, depth=32),
+    "wide_say": lambda lines: print_heavy(lines, width=32),
+    "concat": concat_chain,
+    "variables": lambda lines: variable_heavy(lines, names=512),
+}
+
+# What each stage's throughput counts.
+UNITS = {"lex": "tokens", "parse": "nodes", "interpret": "statements"}
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--lines", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--shapes", default=",".join(SHAPES),
+                        help="Comma-separated shapes to run (default: all).")
+    parser.add_argument("--json", metavar="FILE", help="Write the results to FILE.")
+    parser.add_argument("--baseline", metavar="FILE", help="Compare against results written by --json.")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Percent change counted as a regression (default: 10).")
+    args = parser.parse_args()
+    setup(args)
+
+    results = {}
+    for shape in args.shapes.split(","):
+        results[shape] = measure(SHAPES[shape](args.lines), args.repeat)
+        for stage, result in results[shape].items():
+            print(f"{shape:>12} {stage:>9}: {result['count']:>8} {UNITS[stage]:<10} in {result['seconds']:.3f}s "
+                  f"({result['per_sec']:>12,.0f} {UNITS[stage]}/sec, peak {result['peak_bytes'] / 2**20:7.2f} MiB)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "src": os.path.abspath(args.src),
+                "lines": args.lines,
+                "results": results,
+            }, f, indent=2)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["lines"] != args.lines:
+            print(f"warning: baseline ran {baseline['lines']} lines, this ran {args.lines}", file=sys.stderr)
+        if compare(baseline["results"], results, args.threshold):
+            sys.exit(1)
+
+
+def measure(code, repeat):
+    """Returns {stage: {count, seconds, per_sec, peak_bytes}} for lexing, parsing and running `code`."""
+    from core.interpreter import Interpreter
+    from core.lexer import Lexer
+    from core.parser import Parser
+
+    lexer = Lexer(code, "<bench>")
+    source = lexer.source
+    tokens = lexer.lex()
+    ast = Parser(tokens, source).parse()
+    new_context = context_factory(ast)
+
+    def lex():
+        return Lexer(code, "<bench>").lex()
+
+    def parse():
+        return Parser(tokens, source).parse()
+
+    def interpret():
+        # Output is written and dropped, so it adds no memory of its own.
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            Interpreter(source).interpret(ast, new_context())
+
+    counts = {"lex": len(tokens), "parse": count_nodes(ast), "interpret": len(ast.statements)}
+    stages = {}
+    for stage, func in (("lex", lex), ("parse", parse), ("interpret", interpret)):
+        seconds, _ = best_of(func, repeat)
+        stages[stage] = {
+            "count": counts[stage],
+            "seconds": seconds,
+            "per_sec": counts[stage] / seconds,
+            "peak_bytes": peak_memory(func),
+        }
+    return stages
+
+
+def peak_memory(func):
+    """Peak bytes allocated while `func` runs, what it returns included."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def compare(baseline, results, threshold):
+    """Prints the change against `baseline` per stage, returns whether anything regressed."""
+    print(f"\nagainst baseline (regression: >{threshold:g}% slower or more memory):")
+    regressed = False
+    for shape, stages in results.items():
+        for stage, result in stages.items():
+            before = baseline.get(shape, {}).get(stage)
+            if before is None:
+                print(f"{shape:>12} {stage:>9}: not in baseline")
+                continue
+            speed = (result["per_sec"] / before["per_sec"] - 1) * 100
+            memory = (result["peak_bytes"] / before["peak_bytes"] - 1) * 100 if before["peak_bytes"] else 0.0
+            bad = speed < -threshold or memory > threshold
+            regressed = regressed or bad
+            print(f"{shape:>12} {stage:>9}: throughput {speed:+7.1f}%, peak memory {memory:+7.1f}%"
+                  + ("  REGRESSION" if bad else ""))
+    return regressed
+
+
+if __name__ == "__main__":
+    main()
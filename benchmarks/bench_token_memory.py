@@ -0,0 +1,32 @@
+"""Memory held by a lexed token list, in bytes per token."""
+import gc
+import tracemalloc
+
+from _common import arg_parser, setup
+from generators import assignment_chain
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--lines", type=int, default=50_000)
+    args = parser.parse_args()
+    setup(args)
+
+    from core.lexer import Lexer
+
+    code = assignment_chain(args.lines)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tokens = Lexer(code, "<bench>").lex()
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    print(f"tokens: {len(tokens)} tokens from {len(code):,} source bytes, "
+          f"{held:,} bytes held ({held / len(tokens):.1f} bytes/token, "
+          f"{held / len(code):.1f}x the source)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Memory the tree walker allocates per executed statement, from tracemalloc.
+
+``peak`` is the most memory a statement had allocated at once above what was
+held before it ran (its temporaries), ``held`` is what it left behind (the
+variables it assigned, literal values cached on the AST).
+"""
+import contextlib
+import gc
+import importlib.util
+import tracemalloc
+
+from _common import arg_parser, context_factory, setup
+from generators import arithmetic_heavy, print_heavy, variable_heavy
+
+
+class Discard:
+    """Output that keeps nothing, so printing allocates no buffer.
+
+    Given to the tree walker as its output sink. Trees from before sinks
+    print to sys.stdout instead, which it then replaces.
+    """
+
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--lines", type=int, default=5_000)
+    args = parser.parse_args()
+    setup(args)
+
+    from core.interpreter import Interpreter
+    from core.lexer import Lexer
+    from core.parser import Parser
+
+    has_sinks = importlib.util.find_spec("core.output") is not None
+
+    for name, generator in (("arithmetic", arithmetic_heavy), ("variables", variable_heavy), ("print", print_heavy)):
+        lexer = Lexer(generator(args.lines), "<bench>")
+        ast = Parser(lexer.lex(), lexer.source).parse()
+        context = context_factory(ast)()
+        interpreter = Interpreter(lexer.source, Discard()) if has_sinks else Interpreter(lexer.source)
+        statements = ast.statements
+
+        with contextlib.redirect_stdout(Discard()):
+            gc.collect()
+            tracemalloc.start()
+            start = tracemalloc.get_traced_memory()[0]
+            peak = 0
+            for statement in statements:
+                before = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                interpreter.interpret(statement, context)
+                peak += tracemalloc.get_traced_memory()[1] - before
+            held = tracemalloc.get_traced_memory()[0] - start
+            tracemalloc.stop()
+
+        print(f"{name:>10}: {len(statements)} statements, "
+              f"{peak / len(statements):,.0f} bytes peak/statement, "
+              f"{held / len(statements):,.1f} bytes held/statement")
+
+
+if __name__ == "__main__":
+    main()
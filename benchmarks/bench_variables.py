@@ -0,0 +1,27 @@
+"""Tree walker on a script dominated by variable reads and writes."""
+from _common import arg_parser, best_of, context_factory, setup
+from generators import variable_heavy
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--lines", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    setup(args)
+
+    from core.interpreter import Interpreter
+    from core.lexer import Lexer
+    from core.parser import Parser
+
+    lexer = Lexer(variable_heavy(args.lines), "<bench>")
+    ast = Parser(lexer.lex(), lexer.source).parse()
+    new_context = context_factory(ast)
+
+    elapsed, _ = best_of(lambda: Interpreter(lexer.source).interpret(ast, new_context()), args.repeat)
+    print(f"variables: {args.lines} statements in {elapsed:.3f}s "
+          f"({args.lines / elapsed:,.0f} statements/sec)")
+
+
+if __name__ == "__main__":
+    main()
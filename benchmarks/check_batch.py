@@ -0,0 +1,44 @@
+"""Checks what ``peng.py -j N`` reports for files and patterns that name no script.
+
+Runs batches of a script that works, a missing file and glob patterns
+(on the command line and in a ``--manifest``) that match nothing, and
+checks the exit status and the ``ok``/``FAIL`` line of every entry: a
+pattern matching nothing must fail like a missing file, not vanish from
+the batch.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+from _common import SRC
+
+
+def main():
+    peng = os.path.join(SRC, "peng.py")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, text in (("a.peng", "say 1\n"), ("b.peng", "say 2\n"), ("list.txt", "a.peng\nnomatch*.peng\n")):
+            with open(os.path.join(tmp, name), "w") as f:
+                f.write(text)
+
+        cases = [
+            (["*.peng"], 0, ["ok   a.peng", "ok   b.peng"]),
+            (["a.peng", "missing.peng"], 1, ["ok   a.peng", "FAIL missing.peng"]),
+            (["nomatch*.peng"], 1, ["FAIL nomatch*.peng"]),
+            (["a.peng", "nomatch*.peng"], 1, ["ok   a.peng", "FAIL nomatch*.peng"]),
+            (["--manifest", "list.txt"], 1, ["ok   a.peng", "FAIL nomatch*.peng"]),
+        ]
+        failures = 0
+        for argv, status, lines in cases:
+            run = subprocess.run([sys.executable, peng, "--no-cache", "-j", "2", *argv], cwd=tmp,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            reported = [line.split(" (exit")[0] for line in run.stderr.splitlines()[:-1]]
+            ok = run.returncode == status and reported == lines
+            failures += not ok
+            print(f"{' '.join(argv):>28}: " + ("ok" if ok else f"exit {run.returncode}, reported {run.stderr!r}"))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Differential check of the lexer and parser against those of another git revision.
+
+Lexes and parses ``--count`` random sources, half of them token soup, half
+well-formed nested expressions, with both trees and reports every source
+where they disagree: on the AST (node types, operators, values and spans)
+or on the error (its message, which has the line and column, and its
+offsets). To check the parser rewrite against the recursive parser it
+replaced::
+
+    python check_parser.py 4e7a520~
+
+Any revision will do, back to trees without ``lexer.source`` whose
+positions were Position objects; a tree that crashes on a source has the
+exception as its result.
+
+With ``--depth N``, the working tree then also runs right-nested, unary
+and mixed expressions N deep, and a chain of N terms, on every engine,
+which must agree on their output.
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import random
+import sys
+import tempfile
+
+from _common import SRC, extract_src
+
+ATOMS = ["a", "1", "2.5", '"s"', "(", ")", "+", "-", "*", "/", " ", ",", "say ", "x is "]
+LEAVES = ["a", "1", "2.5", '"s"', "b"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("rev", help="git revision whose src/ tree is compared against.")
+    parser.add_argument("--src", default=SRC, help="src/ tree to check (default: the working tree).")
+    parser.add_argument("--count", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--depth", type=int, default=0, help="Also run expressions this deep end to end.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old = load(extract_src(args.rev, tmp))
+    new = load(args.src)
+
+    rnd = random.Random(args.seed)
+    mismatches = 0
+    for _ in range(args.count):
+        code = random_source(rnd)
+        before = parse(*old, code)
+        after = parse(*new, code)
+        if before != after:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"{code!r}\n  {args.rev}: {before}\n  {args.src}: {after}")
+    print(f"{args.count} sources, {mismatches} mismatches")
+
+    if args.depth:
+        sys.path.insert(0, args.src)
+        mismatches += check_depth(args.depth)
+    if mismatches:
+        sys.exit(1)
+
+
+def load(src):
+    """Imports the Lexer, Parser and Error classes of the ``src/`` tree at ``src``."""
+    for name in [name for name in sys.modules if name == "core" or name.startswith("core.")]:
+        del sys.modules[name]
+    sys.path.insert(0, src)
+    try:
+        lexer = importlib.import_module("core.lexer")
+        parser = importlib.import_module("core.parser")
+        errors = importlib.import_module("core.errors")
+    finally:
+        sys.path.remove(src)
+    return lexer.Lexer, parser.Parser, errors.Error
+
+
+def random_source(rnd):
+    if rnd.random() < 0.5:
+        code = "".join(rnd.choice(ATOMS) for _ in range(rnd.randint(1, 25)))
+        return rnd.choice(["say ", "x is ", ""]) + code
+    return "\n".join(rnd.choice(["say ", "x is "]) + random_expression(rnd, 0) for _ in range(rnd.randint(1, 3)))
+
+
+def random_expression(rnd, depth):
+    r = rnd.random()
+    if depth > 4 or r < 0.3:
+        return rnd.choice(LEAVES)
+    if r < 0.5:
+        return rnd.choice(["-", "+", ""]) + "(" + random_expression(rnd, depth + 1) + ")"
+    if r < 0.6:
+        return rnd.choice(["-", "+"]) + random_expression(rnd, depth + 1)
+    return random_expression(rnd, depth + 1) + rnd.choice([" + ", " - ", " * ", " / "]) + random_expression(rnd, depth + 1)
+
+
+def parse(lexer_class, parser_class, error_class, code):
+    """The AST or error of ``code``, or the exception the tree crashed with, as plain data."""
+    try:
+        return parse_or_crash(lexer_class, parser_class, error_class, code)
+    except Exception as exc:
+        return ("crash", repr(exc))
+
+
+def parse_or_crash(lexer_class, parser_class, error_class, code):
+    lexer = lexer_class(code, "<check>")
+    tokens = lexer.lex()
+    if isinstance(tokens, error_class):
+        return error(tokens)
+    # Trees before the Source class have no lexer.source and parse the tokens alone.
+    source = getattr(lexer, "source", None)
+    ast = (parser_class(tokens) if source is None else parser_class(tokens, source)).parse()
+    if isinstance(ast, error_class):
+        return error(ast)
+    return dump(ast)
+
+
+def offset(pos):
+    """``pos`` as an offset, on trees whose positions are still Position objects too."""
+    return getattr(pos, "idx", pos)
+
+
+def error(exc):
+    return ("error", str(exc), offset(exc.pos_start), offset(exc.pos_end))
+
+
+def dump(ast):
+    """``ast`` as a flat list of (type, detail, pos_start, pos_end), in pre-order and without recursing."""
+    out = []
+    stack = [ast]
+    while stack:
+        node = stack.pop()
+        name = type(node).__name__
+        children = []
+        if name in ("BinOpNode", "UnaryOpNode"):
+            detail = node.op.type
+            children = [node.left, node.right] if name == "BinOpNode" else [node.node]
+        elif name == "VarAsgnNode":
+            detail = node.name
+            children = [node.node]
+        elif name == "PrintNode":
+            detail = len(node.nodes)
+            children = node.nodes
+        elif name == "ExpressionNode":
+            detail = len(node.statements)
+            children = node.statements
+        else:
+            detail = repr(node)
+        out.append((name, detail, offset(getattr(node, "pos_start", None)), offset(getattr(node, "pos_end", None))))
+        stack.extend(reversed(children))
+    return out
+
+
+def check_depth(depth):
+    """Runs expressions `depth` deep on every engine of the working tree, returns how many disagreed."""
+    import peng
+    from core.output import CaptureSink
+
+    shapes = {
+        "right-nested": "x is " + "(1 + " * depth + "1" + ")" * depth + "\nsay x\n",
+        "unary": "x is " + "-(1 * " * depth + "1" + ")" * depth + "\nsay x\n",
+        "mixed": "a is 1\nsay " + "-(a - (a * " * depth + "a" + "))" * depth + "\n",
+        "chain": "a is 2\nx is " + " - ".join(["a"] * depth) + "\nsay x, -x\n",
+    }
+    mismatches = 0
+    for shape, code in shapes.items():
+        results = {}
+        for engine in peng.ENGINES:
+            output = CaptureSink()
+            # Errors are printed, they are compared with the output.
+            with contextlib.redirect_stdout(io.StringIO()) as printed:
+                peng.compile_and_run(code, "<check>", engine, output=output)
+            results[engine] = output.getvalue() + printed.getvalue()
+        agree = len(set(results.values())) == 1
+        mismatches += not agree
+        print(f"{shape:>12} {depth} deep: " + ("ok" if agree else f"engines disagree: {results}"))
+    return mismatches
+
+
+if __name__ == "__main__":
+    main()
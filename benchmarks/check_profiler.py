@@ -0,0 +1,55 @@
+"""Checks the node visits ``peng.py --profile`` reports against the scripts it ran.
+
+Profiles scripts with operators nested every way (chains, right-nested,
+unary, mixed, and ``--depth`` deep) at opt-level 0, so that no node is
+folded away, and compares every node type's visits with the nodes of
+that type in the script. Also checks that no type's own time exceeds its
+cumulative time.
+"""
+import argparse
+import sys
+
+from _common import SRC
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--src", default=SRC, help="src/ tree to check (default: the working tree).")
+    parser.add_argument("--depth", type=int, default=2_000)
+    args = parser.parse_args()
+    sys.path.insert(0, args.src)
+
+    import peng
+    from core.output import CaptureSink
+    from core.profiler import Profiler
+
+    depth = args.depth
+    scripts = {
+        "chain": ("a is 1\nb is 2\nc is a + b + a + b + a\n",
+                  {"BinOpNode": 4, "VarGetNode": 5, "VarAsgnNode": 3, "NumberNode": 2}),
+        "nested": ("a is 1\nb is 2\nsay -(a * -b), a - (b - (a - -b))\n",
+                   {"BinOpNode": 4, "UnaryOpNode": 3, "VarGetNode": 6, "PrintNode": 1}),
+        "right-nested": ("x is " + "(1 + " * depth + "1" + ")" * depth + "\n",
+                         {"BinOpNode": depth, "NumberNode": depth + 1}),
+        "unary": ("x is " + "-(1 * " * depth + "1" + ")" * depth + "\n",
+                  {"BinOpNode": depth, "UnaryOpNode": depth, "NumberNode": depth + 1}),
+        "mixed chain": ("a is 2\nx is " + " - ".join(["-a"] * depth) + "\n",
+                        {"BinOpNode": depth - 1, "UnaryOpNode": depth, "VarGetNode": depth}),
+    }
+    failures = 0
+    for name, (code, expected) in scripts.items():
+        profiler = Profiler()
+        peng.compile_and_run(code, "<check>", "tree", opt_level=0, output=CaptureSink(), profiler=profiler)
+        visits = {node_type: count for node_type, (count, _, _, _) in profiler.nodes.items() if count}
+        wrong = {node_type: (visits.get(node_type, 0), count)
+                 for node_type, count in expected.items() if visits.get(node_type, 0) != count}
+        over = [node_type for node_type, (_, total, own, _) in profiler.nodes.items() if own > total * 1.001 + 1e-6]
+        ok = not wrong and not over
+        failures += not ok
+        print(f"{name:>12}: " + ("ok" if ok else f"(visits, nodes) {wrong}, own over cumulative {over}"))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Checks that ``peng.py --stream`` runs in memory that does not grow with the script.
+
+Streams ``arithmetic_heavy`` scripts of ``--statements`` and four times as
+many statements through ``peng.run_stream`` on every engine and reports
+the tracemalloc peak of each run. The scripts assign three variables over
+and over, with a new constant in every statement, so whatever an engine
+keeps per statement (a constant pool that only grows, say) shows as a
+peak growing with the script. An engine whose peak more than doubles
+fails the check.
+"""
+import contextlib
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from _common import arg_parser, setup
+from generators import arithmetic_heavy
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--statements", type=int, default=10_000)
+    args = parser.parse_args()
+    setup(args)
+
+    import peng
+
+    if not hasattr(peng, "run_stream"):
+        print("no --stream in this tree")
+        return
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        sizes = []
+        for statements in (args.statements, args.statements * 4):
+            sizes.append((statements, os.path.join(tmp, f"stream{statements}.peng")))
+            with open(sizes[-1][1], "w") as f:
+                f.write(arithmetic_heavy(statements))
+
+        for engine in getattr(peng, "ENGINES", ["tree"]):
+            # Untraced, so the imports of the engine's first run don't count.
+            peak_memory(peng, engine, sizes[0][1], trace=False)
+            peaks = []
+            for statements, file_name in sizes:
+                peaks.append(peak_memory(peng, engine, file_name))
+                print(f"{engine:>6}: {statements:>7,} statements, {peaks[-1] / 1e6:6.2f} MB peak")
+            if peaks[-1] > 2 * peaks[0]:
+                failures += 1
+                print(f"{engine:>6}: peak grows with the script")
+    if failures:
+        sys.exit(1)
+
+
+def peak_memory(peng, engine, file_name, trace=True):
+    """tracemalloc peak of streaming `file_name` on `engine`, its output thrown away."""
+    with open(file_name) as stream, open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if not trace:
+            peng.run_stream(stream, file_name, engine)
+            return None
+        tracemalloc.start()
+        try:
+            peng.run_stream(stream, file_name, engine)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Generators for synthetic PENG programs of configurable size."""
+
+
+def assignment_chain(lines):
+    """Machine-generated style script: assignments, arithmetic and prints."""
+    out = []
+    for i in range(lines):
+        if i % 4 == 0:
+            out.append(f"v{i} is {i} + {i % 7} * (v{i - 4 if i >= 4 else 0} - 3.5)" if i >= 4 else f"v{i} is {i}")
+        elif i % 4 == 1:
+            out.append(f"s{i} is \"item {i}\\t\" + \"value\"")
+        elif i % 4 == 2:
+            out.append(f"say \"line\", {i}, s{i - 1}")
+        else:
+            out.append(f"w{i} is v{i - 3} / 2 - {i}")
+    return "\n".join(out) + "\n"
+
+
+def arithmetic_heavy(lines, terms=12):
+    """Long arithmetic expressions over a handful of variables."""
+    out = ["a is 3", "b is 4.5", "c is 7"]
+    names = ["a", "b", "c", "1", "2.5", "(a - 1)"]
+    ops = ["+", "-", "*", "/"]
+    for i in range(lines):
+        expr = names[i % len(names)]
+        for j in range(1, terms):
+            expr += f" {ops[(i + j) % 3]} {names[(i * 7 + j) % len(names)]}"
+        out.append(f"{'abc'[i % 3]} is ({expr}) / {i + 1000}")
+    return "\n".join(out) + "\n"
+
+
+def print_heavy(lines, width=6):
+    """`say` statements with `width` values each."""
+    out = ["n is 42", "s is \"text\""]
+    for i in range(lines):
+        kinds = ["n", "s", str(i), "\"literal\"", "n * 2", "s + \"!\""]
+        values = ", ".join(kinds[j % len(kinds)] for j in range(width))
+        out.append(f"say {values}")
+    return "\n".join(out) + "\n"
+
+
+def deep_parens(lines, depth=32):
+    """Expressions nested `depth` parentheses deep, one per statement."""
+    out = ["x is 1"]
+    for i in range(lines):
+        expr = "x"
+        for d in range(depth):
+            # Adds, subtracts and multiplies by 1, so x only drifts slowly.
+            expr = f"({expr} {'+-*'[d % 3]} {1 if d % 3 == 2 else d % 7 + 1})"
+        out.append(f"x is {expr} - {i % 5}")
+    return "\n".join(out) + "\n"
+
+
+def variable_heavy(lines, names=16):
+    """Statements that mostly read and write variables, few literals."""
+    out = [f"x{j} is {j + 1}" for j in range(names)]
+    for i in range(lines):
+        a, b, c, d = (f"x{(i * k + k) % names}" for k in (1, 3, 5, 7))
+        # An average plus a no-op, so the values stay bounded.
+        out.append(f"x{i % names} is ({a} + {b} + {c} + {d}) / 4 + {a} - {a} * 1")
+    return "\n".join(out) + "\n"
+
+
+def concat_chain(lines, piece="abcdefgh"):
+    """One string grown by a piece per statement, then printed once."""
+    out = ["s is \"\""]
+    out.extend(f"s is s + \"{piece}\"" for _ in range(lines))
+    out.append("say s")
+    return "\n".join(out) + "\n"
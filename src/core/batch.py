@@ -0,0 +1,92 @@
+import glob
+import os
+import sys
+from time import perf_counter
+
+
+def expand(patterns, manifest=None):
+    """Returns the script paths named by `patterns` and the `manifest` file.
+
+    A pattern that is not an existing file is expanded as a glob (`**`
+    included), sorted; one that matches nothing is kept as it is, so that it
+    fails to run like a missing file instead of going unnoticed. A manifest lists one path or pattern per line, relative
+    to its own directory; blank lines and lines starting with # are skipped.
+    """
+    if manifest is not None:
+        stream = sys.stdin if manifest == "-" else open(manifest)
+        base = "" if manifest == "-" else os.path.dirname(manifest)
+        with stream:
+            lines = [line.strip() for line in stream]
+        patterns = [*patterns, *(os.path.join(base, line) for line in lines if line and not line.startswith("#"))]
+
+    files = []
+    for pattern in patterns:
+        if glob.has_magic(pattern) and not os.path.exists(pattern):
+            files.extend(sorted(glob.glob(pattern, recursive=True)) or [pattern])
+        else:
+            files.append(pattern)
+    return files
+
+
+def output_path(output_dir, file_name):
+    """`output_dir/dir/script.peng.out` for `dir/script.peng`, mirroring relative paths."""
+    path = os.path.relpath(os.path.abspath(file_name))
+    if path.startswith(os.pardir):
+        path = os.path.splitdrive(os.path.abspath(file_name))[1].lstrip(os.sep)
+    return os.path.join(output_dir, path + ".out")
+
+
+def run_batch(files, run_file, jobs=1, output=None, output_dir=None, report=None, initializer=None):
+    """Runs every script in `files`, returns how many of them failed.
+
+    `run_file(file_name)` runs one script on a fresh Context and returns its
+    exit status, the first line of its error (or None) and everything it
+    printed. With `jobs` > 1 the scripts run on that many worker processes,
+    which call `initializer` once. Each script's output goes to its own file
+    under `output_dir`, or else to the `output` sink in the order of `files`,
+    whatever order they finish in. A status line per script and a summary are
+    written to `report`, stderr by default.
+    """
+    if report is None:
+        report = sys.stderr
+    start = perf_counter()
+    failed = 0
+
+    if jobs > 1 and len(files) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        pool = ProcessPoolExecutor(jobs, initializer=initializer)
+        # Batches of scripts per round trip to a worker, small enough to
+        # keep every worker busy until the end.
+        chunksize = max(1, min(64, len(files) // (jobs * 8)))
+        results = pool.map(run_file, files, chunksize=chunksize)
+    else:
+        pool = None
+        results = map(run_file, files)
+
+    try:
+        for file_name, (status, error, text) in zip(files, results):
+            if output_dir is not None:
+                path = output_path(output_dir, file_name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as f:
+                    f.write(text)
+            elif output is not None and text:
+                output.write(text)
+
+            if status:
+                failed += 1
+                print(f"FAIL {file_name} (exit {status})" + (f": {error}" if error else ""), file=report)
+            else:
+                print(f"ok   {file_name}", file=report)
+    finally:
+        if output is not None:
+            output.flush()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    elapsed = perf_counter() - start
+    rate = len(files) / elapsed if elapsed else float("inf")
+    print(f"{len(files)} scripts, {len(files) - failed} ok, {failed} failed in {elapsed:.3f}s "
+          f"({rate:,.1f} scripts/sec, {jobs} {'job' if jobs == 1 else 'jobs'})", file=report)
+    return failed
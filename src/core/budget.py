@@ -0,0 +1,28 @@
+class Budget:
+    """Limits on what one run of an untrusted script may use.
+
+    Give one to `Interpreter(source, output, budget=...)`, `Program.run` or
+    `peng.compile_and_run`; every limit left None is not checked at all.
+
+    - `max_nodes`: AST nodes evaluated, checked before each statement.
+    - `max_string_length`: characters in a string made by `+` or `*`,
+      assigned or said. Long strings are ropes until their text is needed,
+      so this is checked before it is ever allocated.
+    - `max_output`: characters written by `say`, checked before a line is.
+    - `time_limit`: seconds of wall-clock time from when the engine is
+      made, checked before each statement and while a long string is said.
+
+    Running past one raises a BudgetExceededError at the statement that did.
+    A Budget holds no state of a run and can be shared by any number of them.
+    """
+
+    def __init__(self, max_nodes=None, max_string_length=None, max_output=None, time_limit=None):
+        self.max_nodes = max_nodes
+        self.max_string_length = max_string_length
+        self.max_output = max_output
+        self.time_limit = time_limit
+
+    def __repr__(self):
+        return (f"Budget(max_nodes={self.max_nodes!r}, max_string_length={self.max_string_length!r}, "
+                f"max_output={self.max_output!r}, time_limit={self.time_limit!r})")
+
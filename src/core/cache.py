@@ -0,0 +1,207 @@
+import gc
+import os
+import struct
+import sys
+
+try:
+    # What hashlib.blake2b is, without hashlib loading OpenSSL at startup.
+    from _blake2 import blake2b
+except ImportError:
+    from hashlib import blake2b
+
+from .parser import (
+    BinOpNode, ExpressionNode, NumberNode, PrintNode, StringNode,
+    UnaryOpNode, VarAsgnNode, VarGetNode, postorder
+)
+from .tokens import (
+    Token, TOK_DIV, TOK_FLOAT, TOK_IDENTIFIER, TOK_INT, TOK_MINUS, TOK_MUL,
+    TOK_PLUS, TOK_STRING
+)
+
+CACHE_DIR = "__pengcache__"
+SUFFIX = ".pengc"
+
+# Format version and byte order are part of the magic, a file written by
+# another layout or machine is just a miss.
+MAGIC = b"PENGC\x01" + (b"L" if sys.byteorder == "little" else b"B") + b"\x00"
+
+# magic, source digest, then the item counts of the four sections:
+# string lengths, string bytes, floats and records.
+HEADER = struct.Struct("<8s32sQQQQ")
+
+# Every node is one record of four int64s, children before their parent.
+K_INT = 0       # value, pos_start, pos_end
+K_BIGINT = 1    # string index of the digits, pos_start, pos_end
+K_FLOAT = 2     # float index, pos_start, pos_end
+K_STRING = 3    # string index, pos_start, pos_end
+K_BINOP = 4     # operator, operator pos_start, pos_end
+K_UNARY = 5     # operator, operator pos_start, pos_end
+K_ASSIGN = 6    # name index, name pos_start, pos_end
+K_GET = 7       # name index, name pos_start, pos_end
+K_PRINT = 8     # value count, 0, 0
+K_STATEMENTS = 9  # statement count, 0, 0
+
+OPERATORS = [(TOK_PLUS, "+"), (TOK_MINUS, "-"), (TOK_MUL, "*"), (TOK_DIV, "/")]
+OPERATOR_CODES = {op_type: code for code, (op_type, _) in enumerate(OPERATORS)}
+
+INT64_MIN = -(1 << 63)
+INT64_MAX = (1 << 63) - 1
+
+
+def cache_path(file_name):
+    """`dir/script.peng` is cached as `dir/__pengcache__/script.peng.pengc`."""
+    directory, name = os.path.split(os.path.abspath(file_name))
+    return os.path.join(directory, CACHE_DIR, name + SUFFIX)
+
+
+def source_digest(code, version):
+    return blake2b(version.encode() + b"\x00" + code.encode("utf-8", "surrogatepass"), digest_size=32).digest()
+
+
+def load(file_name, code, version):
+    """Returns the cached AST of `code`, or None when there is no valid entry."""
+    try:
+        with open(cache_path(file_name), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    # Building the nodes would otherwise set off collections over the
+    # growing tree, and it has no cycles to find.
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return decode(data, source_digest(code, version))
+    except (ValueError, IndexError, KeyError, TypeError, struct.error):
+        # Truncated or corrupt, it will be rewritten.
+        return None
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def store(file_name, code, version, ast):
+    """Writes the cache entry for `code`. Fails silently, the cache is optional."""
+    path = cache_path(file_name)
+    try:
+        data = encode(ast, source_digest(code, version))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written aside and renamed over, so a reader never sees half a file.
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except (OSError, ValueError):
+        pass
+
+
+def encode(ast, digest):
+    # Only needed on a miss: array imports collections.abc, decode does
+    # without it.
+    from array import array
+
+    records = array("q")
+    floats = array("d")
+    strings = {}
+
+    def string(text):
+        idx = strings.get(text)
+        if idx is None:
+            idx = strings[text] = len(strings)
+        return idx
+
+    for node in postorder(ast):
+        node_type = type(node)
+
+        if node_type is NumberNode:
+            if type(node.num) is float:
+                records.extend((K_FLOAT, len(floats), node.pos_start, node.pos_end))
+                floats.append(node.num)
+            elif INT64_MIN <= node.num <= INT64_MAX:
+                records.extend((K_INT, node.num, node.pos_start, node.pos_end))
+            else:
+                records.extend((K_BIGINT, string(str(node.num)), node.pos_start, node.pos_end))
+        elif node_type is StringNode:
+            records.extend((K_STRING, string(node.str_val), node.pos_start, node.pos_end))
+        elif node_type is VarGetNode:
+            token = node.name_token
+            records.extend((K_GET, string(node.name), token.pos_start, token.pos_end))
+        elif node_type is BinOpNode:
+            records.extend((K_BINOP, OPERATOR_CODES[node.op.type], node.op.pos_start, node.op.pos_end))
+        elif node_type is UnaryOpNode:
+            records.extend((K_UNARY, OPERATOR_CODES[node.op.type], node.op.pos_start, node.op.pos_end))
+        elif node_type is VarAsgnNode:
+            token = node.name_token
+            records.extend((K_ASSIGN, string(node.name), token.pos_start, token.pos_end))
+        elif node_type is PrintNode:
+            records.extend((K_PRINT, len(node.nodes), 0, 0))
+        elif node_type is ExpressionNode:
+            records.extend((K_STATEMENTS, len(node.statements), 0, 0))
+        else:
+            raise ValueError(f"Can't cache node {node_type.__name__}")
+
+    encoded = [text.encode("utf-8", "surrogatepass") for text in strings]
+    lengths = array("q", map(len, encoded))
+    blob = b"".join(encoded)
+    header = HEADER.pack(MAGIC, digest, len(lengths), len(blob), len(floats), len(records))
+    return b"".join((header, lengths.tobytes(), blob, floats.tobytes(), records.tobytes()))
+
+
+def decode(data, digest):
+    magic, file_digest, n_lengths, n_blob, n_floats, n_records = HEADER.unpack_from(data)
+    if magic != MAGIC or file_digest != digest:
+        return None
+
+    if HEADER.size + 8 * (n_lengths + n_floats + n_records) + n_blob != len(data):
+        return None
+    view = memoryview(data)
+    offset = HEADER.size
+    lengths = view[offset:offset + 8 * n_lengths].cast("q")
+    offset += 8 * n_lengths
+    blob = bytes(view[offset:offset + n_blob])
+    offset += n_blob
+    floats = view[offset:offset + 8 * n_floats].cast("d")
+    offset += 8 * n_floats
+    records = view[offset:].cast("q")
+
+    intern = sys.intern
+    strings = []
+    start = 0
+    for length in lengths:
+        strings.append(intern(blob[start:start + length].decode("utf-8", "surrogatepass")))
+        start += length
+
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    fields = iter(records)
+    for kind, a, pos_start, pos_end in zip(fields, fields, fields, fields):
+        if kind == K_INT:
+            push(NumberNode(Token(TOK_INT, a, pos_start, pos_end)))
+        elif kind == K_FLOAT:
+            push(NumberNode(Token(TOK_FLOAT, floats[a], pos_start, pos_end)))
+        elif kind == K_STRING:
+            push(StringNode(Token(TOK_STRING, strings[a], pos_start, pos_end)))
+        elif kind == K_GET:
+            push(VarGetNode(Token(TOK_IDENTIFIER, strings[a], pos_start, pos_end)))
+        elif kind == K_BINOP:
+            right = pop()
+            push(BinOpNode(pop(), Token(*OPERATORS[a], pos_start, pos_end), right))
+        elif kind == K_UNARY:
+            push(UnaryOpNode(Token(*OPERATORS[a], pos_start, pos_end), pop()))
+        elif kind == K_ASSIGN:
+            push(VarAsgnNode(Token(TOK_IDENTIFIER, strings[a], pos_start, pos_end), pop()))
+        elif kind == K_PRINT or kind == K_STATEMENTS:
+            first = len(stack) - a
+            if first < 0 or a < (kind == K_PRINT):
+                return None
+            children = stack[first:]
+            del stack[first:]
+            push(PrintNode(children) if kind == K_PRINT else ExpressionNode(children))
+        elif kind == K_BIGINT:
+            push(NumberNode(Token(TOK_INT, int(strings[a]), pos_start, pos_end)))
+        else:
+            return None
+
+    if len(stack) != 1 or type(stack[0]) is not ExpressionNode:
+        return None
+    return stack[0]
@@ -0,0 +1,63 @@
+import os
+import sys
+# socket.py on top of this imports enum and selectors, which would about
+# double the time a client takes to start.
+from _socket import AF_UNIX, SCM_RIGHTS, SOCK_STREAM, SOL_SOCKET, socket
+
+# A message is its size as 4 bytes and as many bytes of NUL-separated fields.
+# The request, sent together with the client's stdin, stdout and stderr, has
+# the working directory, the timeout ("" for none) and the arguments. The
+# reply, sent once the script ended, has the exit status and an error ("" for
+# none). Kept this small so `peng.py --client` starts quickly.
+HEADER_SIZE = 4
+MAX_MESSAGE = 1 << 20
+
+
+def pack(fields):
+    payload = b"\0".join(map(os.fsencode, fields))
+    return len(payload).to_bytes(HEADER_SIZE, "big") + payload
+
+
+def unpack(data):
+    """Returns the fields of the message `data` starts with, or None if it is not all there yet."""
+    if len(data) >= HEADER_SIZE:
+        size = int.from_bytes(data[:HEADER_SIZE], "big")
+        if size > MAX_MESSAGE:
+            raise ValueError(f"message of {size} bytes")
+        if len(data) >= HEADER_SIZE + size:
+            return [os.fsdecode(field) for field in data[HEADER_SIZE:HEADER_SIZE + size].split(b"\0")]
+    return None
+
+
+def read_message(sock, data=b""):
+    """Returns the fields of the message on `sock`, of which `data` was already read."""
+    while True:
+        fields = unpack(data)
+        if fields is not None:
+            return fields
+        chunk = sock.recv(1 << 16)
+        if not chunk:
+            raise ConnectionError("connection closed before the end of the message")
+        data += chunk
+
+
+def request(path, argv, timeout=None, fds=(0, 1, 2), cwd=None):
+    """Runs `argv` on the `peng.py --serve` at `path`, returns its exit status and error.
+
+    The script reads and writes `fds`, this process's stdin, stdout and
+    stderr by default, directly. The error is None unless the server gave up
+    on the request, e.g. when it ran longer than `timeout` seconds.
+    """
+    message = pack([cwd or os.getcwd(), "" if timeout is None else repr(timeout), *argv])
+    # What socket.send_fds sends: the descriptors as an array of C ints.
+    fd_array = b"".join(fd.to_bytes(4, sys.byteorder, signed=True) for fd in fds)
+    sock = socket(AF_UNIX, SOCK_STREAM)
+    try:
+        sock.connect(path)
+        sent = sock.sendmsg([message], [(SOL_SOCKET, SCM_RIGHTS, fd_array)])
+        if sent < len(message):
+            sock.sendall(message[sent:])
+        status, error = read_message(sock)
+    finally:
+        sock.close()
+    return int(status), error or None
@@ -0,0 +1,148 @@
+from .parser import BinOpNode, UnaryOpNode, postorder
+from .tokens import TOK_DIV, TOK_MINUS, TOK_MUL, TOK_PLUS
+
+#############################
+#         OPCODES           #
+#############################
+
+# Every instruction is an (opcode, argument) pair of ints in `Bytecode.code`.
+LOAD_CONST = 0
+LOAD_NAME = 1
+STORE_NAME = 2
+BINARY_ADD = 3
+BINARY_SUB = 4
+BINARY_MUL = 5
+BINARY_DIV = 6
+UNARY_NEG = 7
+PRINT_ITEM = 8
+PRINT_LAST = 9
+
+OPNAMES = [
+    "LOAD_CONST", "LOAD_NAME", "STORE_NAME",
+    "BINARY_ADD", "BINARY_SUB", "BINARY_MUL", "BINARY_DIV",
+    "UNARY_NEG", "PRINT_ITEM", "PRINT_LAST",
+]
+
+BINARY_OPS = {
+    TOK_PLUS: BINARY_ADD,
+    TOK_MINUS: BINARY_SUB,
+    TOK_MUL: BINARY_MUL,
+    TOK_DIV: BINARY_DIV,
+}
+
+
+class Bytecode:
+    def __init__(self, code, consts, names, spans):
+        self.code = code
+        self.consts = consts
+        self.names = names
+        # (pos_start, pos_end) of the node behind each instruction, for errors.
+        self.spans = spans
+
+    def __repr__(self):
+        lines = []
+        for i in range(0, len(self.code), 2):
+            op, arg = self.code[i], self.code[i + 1]
+            if op == LOAD_CONST:
+                detail = f" ({self.consts[arg]!r})"
+            elif op in (LOAD_NAME, STORE_NAME):
+                detail = f" ({self.names[arg]})"
+            else:
+                detail = ""
+            lines.append(f"{i:>4} {OPNAMES[op]:<11} {arg}{detail}")
+        return "\n".join(lines)
+
+
+class Compiler:
+    """Compiles parser nodes to Bytecode.
+
+    The name table is kept between `compile` calls, so statements compiled
+    one at a time (streaming) share variable slots. The constant pool is
+    per call: a stream's constants die with the statement that used them.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.name_idx = {}
+        self.visitors = {}
+
+    def compile(self, node):
+        self.code = []
+        self.spans = []
+        self.consts = []
+        self.const_idx = {}
+        self.visit(node)
+        return Bytecode(self.code, self.consts, self.names, self.spans)
+
+    def emit(self, op, arg, node):
+        self.code += (op, arg)
+        self.spans.append((node.pos_start, node.pos_end))
+
+    def emit_binary(self, node):
+        # Errors span from the left operand's start to the right one's end,
+        # like the tree walker's values (the node itself may span further).
+        self.code += (BINARY_OPS[node.op.type], 0)
+        self.spans.append((node.left.pos_start, node.right.pos_end))
+
+    def const(self, value):
+        # Keyed on the type too, 1 and 1.0 are equal dict keys. Floats go by
+        # repr, 0.0 and -0.0 are equal as well.
+        key = (float, repr(value)) if type(value) is float else (type(value), value)
+        idx = self.const_idx.get(key)
+        if idx is None:
+            idx = self.const_idx[key] = len(self.consts)
+            self.consts.append(value)
+        return idx
+
+    def name(self, name):
+        idx = self.name_idx.get(name)
+        if idx is None:
+            idx = self.name_idx[name] = len(self.names)
+            self.names.append(name)
+        return idx
+
+    def visit(self, node):
+        func = self.visitors.get(type(node))
+        if func is None:
+            func = getattr(self, f"visit_{type(node).__name__}", None)
+            if func is None:
+                raise RuntimeError(f"Compile Method Not Available for node {type(node).__name__}")
+            self.visitors[type(node)] = func
+        func(node)
+
+    def visit_NumberNode(self, node):
+        self.emit(LOAD_CONST, self.const(node.num), node)
+
+    def visit_StringNode(self, node):
+        self.emit(LOAD_CONST, self.const(node.str_val), node)
+
+    def visit_BinOpNode(self, node):
+        for node in postorder(node):
+            node_type = type(node)
+            if node_type is BinOpNode:
+                self.emit_binary(node)
+            elif node_type is UnaryOpNode:
+                if node.op.type == TOK_MINUS:
+                    self.emit(UNARY_NEG, 0, node.node)
+            else:
+                self.visit(node)
+
+    visit_UnaryOpNode = visit_BinOpNode
+
+    def visit_VarAsgnNode(self, node):
+        self.visit(node.node)
+        self.emit(STORE_NAME, self.name(node.name), node)
+
+    def visit_VarGetNode(self, node):
+        # IdentifierError points at the name itself, not at the node's span.
+        self.emit(LOAD_NAME, self.name(node.name), node.name_token)
+
+    def visit_PrintNode(self, node):
+        last = len(node.nodes) - 1
+        for i, value in enumerate(node.nodes):
+            self.visit(value)
+            self.emit(PRINT_LAST if i == last else PRINT_ITEM, 0, value)
+
+    def visit_ExpressionNode(self, node):
+        for statement in node.statements:
+            self.visit(statement)
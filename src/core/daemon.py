@@ -0,0 +1,297 @@
+import errno
+import gc
+import os
+import selectors
+import signal
+import socket
+import sys
+import time
+
+from .client import pack, unpack
+
+# Seconds a client has to send its whole request.
+REQUEST_TIMEOUT = 5
+
+
+class Request:
+    """A request still arriving on `conn`, given up on at `deadline`."""
+
+    def __init__(self, conn, deadline):
+        self.conn = conn
+        self.deadline = deadline
+        self.data = b""
+        self.fds = []
+
+    def close(self):
+        for fd in self.fds:
+            os.close(fd)
+        self.fds = []
+        self.conn.close()
+
+
+class Job:
+    """A request being run by the child process `pid`."""
+
+    def __init__(self, pid, conn, deadline, timeout):
+        self.pid = pid
+        self.conn = conn
+        self.deadline = deadline
+        self.timeout = timeout
+        self.status = None
+        self.error = None
+
+
+def serve(path, run, timeout=None):
+    """Runs the requests (`peng.py --client`, see `client.request`) arriving on the Unix socket `path`.
+
+    Each request is run by a child forked off this process: it starts with
+    `core` already imported, yet nothing one script does is seen by the
+    next. The child calls `run(argv)` in the client's working directory,
+    with the client's stdin, stdout and stderr passed over the socket, so
+    output reaches the client as it is written. Requests are read as they
+    arrive, without waiting on any one client, and run concurrently. One
+    still running after `timeout` seconds (or the client's own, shorter
+    timeout) is killed. Serves until interrupted or terminated.
+    """
+    listener = bind(path)
+    # Children share the parent's memory until they write to it: keep the
+    # collector from touching (and so copying) everything loaded so far.
+    gc.freeze()
+    # SIGCHLD wakes the select below through this pair, see `reap`.
+    wakeup, wakeup_w = socket.socketpair()
+    wakeup.setblocking(False)
+    wakeup_w.setblocking(False)
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ)
+    selector.register(wakeup, selectors.EVENT_READ)
+    jobs = {}
+    requests = {}
+
+    old_sigchld = signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+    old_sigterm = signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    old_wakeup = signal.set_wakeup_fd(wakeup_w.fileno())
+    try:
+        while True:
+            deadlines = [job.deadline for job in jobs.values() if job.deadline is not None]
+            deadlines.extend(request.deadline for request in requests.values())
+            wait = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+            for key, _ in selector.select(wait):
+                if key.fileobj is listener:
+                    conn, _ = listener.accept()
+                    conn.setblocking(False)
+                    request = requests[conn] = Request(conn, time.monotonic() + REQUEST_TIMEOUT)
+                    selector.register(conn, selectors.EVENT_READ, request)
+                elif key.fileobj is wakeup:
+                    try:
+                        while wakeup.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                elif isinstance(key.data, Request):
+                    request = key.data
+                    try:
+                        fields = receive(request)
+                    except (OSError, ValueError) as exc:
+                        selector.unregister(request.conn)
+                        drop(requests.pop(request.conn), f"invalid request: {exc}")
+                        continue
+                    if fields is None:
+                        continue
+                    selector.unregister(request.conn)
+                    del requests[request.conn]
+                    # The other clients' files too, or they would stay open
+                    # until this child is done.
+                    inherited = [listener, wakeup, wakeup_w, selector, *requests.values()]
+                    job = start(request, fields, run, timeout, inherited, jobs)
+                    if job is not None:
+                        jobs[job.pid] = job
+                        selector.register(job.conn, selectors.EVENT_READ, job)
+                else:
+                    # The client hung up (or broke the protocol): nobody is
+                    # left to see the output.
+                    selector.unregister(key.fileobj)
+                    kill(key.data, "client went away")
+
+            now = time.monotonic()
+            for request in [request for request in requests.values() if request.deadline <= now]:
+                selector.unregister(request.conn)
+                drop(requests.pop(request.conn), "invalid request: timed out")
+            for job in jobs.values():
+                if job.deadline is not None and job.deadline <= now:
+                    kill(job, f"timed out after {job.timeout:g}s")
+            for job in reap(jobs):
+                if job.conn in selector.get_map():
+                    selector.unregister(job.conn)
+                finish(job)
+    finally:
+        signal.set_wakeup_fd(old_wakeup)
+        signal.signal(signal.SIGCHLD, old_sigchld)
+        signal.signal(signal.SIGTERM, old_sigterm)
+        for request in requests.values():
+            drop(request, "server stopped")
+        for job in jobs.values():
+            kill(job, "server stopped")
+            job.status = os.waitstatus_to_exitcode(os.waitpid(job.pid, 0)[1])
+            finish(job)
+        selector.close()
+        wakeup.close()
+        wakeup_w.close()
+        listener.close()
+        os.unlink(path)
+
+
+def bind(path):
+    """Returns a socket listening on `path`, replacing a stale socket file there."""
+    if os.path.exists(path):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(path)
+            except ConnectionRefusedError:
+                os.unlink(path)
+            else:
+                raise OSError(errno.EADDRINUSE, "a server is already running there")
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        # Whoever can connect can run scripts as us: keep it to our user.
+        umask = os.umask(0o177)
+        try:
+            listener.bind(path)
+        finally:
+            os.umask(umask)
+        listener.listen(socket.SOMAXCONN)
+    except OSError:
+        listener.close()
+        raise
+    return listener
+
+
+def receive(request):
+    """Reads what arrived of `request`, returns its fields once it is all there, else None.
+
+    Raises OSError or ValueError if the request is broken.
+    """
+    try:
+        data, fds, _, _ = socket.recv_fds(request.conn, 1 << 16, 3)
+    except BlockingIOError:
+        return None
+    request.fds.extend(fds)
+    if not data:
+        raise ConnectionError("connection closed before the end of the message")
+    request.data += data
+    return unpack(request.data)
+
+
+def drop(request, error):
+    """Answers a `request` that will not be run with `error`."""
+    reply(request.conn, 1, error)
+    request.close()
+
+
+def start(request, fields, run, timeout, inherited, jobs):
+    """Forks the child running a received request, returns its Job or None if it was invalid."""
+    conn = request.conn
+    fds = request.fds
+    try:
+        cwd, client_timeout, *argv = fields
+        if len(fds) != 3:
+            raise ValueError(f"expected 3 file descriptors, got {len(fds)}")
+        limits = [limit for limit in (timeout, client_timeout and float(client_timeout)) if limit]
+    except ValueError as exc:
+        drop(request, f"invalid request: {exc}")
+        return None
+
+    # Blocking again for the reply, which `finish` sends in one go.
+    conn.settimeout(REQUEST_TIMEOUT)
+    pid = os.fork()
+    if pid == 0:
+        run_child(run, argv, cwd, fds, [*inherited, *(job.conn for job in jobs.values()), conn])
+
+    for fd in fds:
+        os.close(fd)
+    limit = min(limits) if limits else None
+    deadline = None if limit is None else time.monotonic() + limit
+    return Job(pid, conn, deadline, limit)
+
+
+def run_child(run, argv, cwd, fds, inherited):
+    """Runs `run(argv)` on the client's files in a forked child, never returns.
+
+    `inherited` are the server's sockets and pending Requests, which the
+    child closes.
+    """
+    status = 1
+    try:
+        for obj in inherited:
+            obj.close()
+        signal.set_wakeup_fd(-1)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        sys.stdin = open(0, "r", closefd=False)
+        # Line buffered where Python would be, on a terminal and for stderr.
+        sys.stdout = open(1, "w", 1 if os.isatty(1) else -1, closefd=False)
+        sys.stderr = open(2, "w", 1, closefd=False)
+        os.chdir(cwd)
+        try:
+            run(argv)
+            status = 0
+        except SystemExit as exc:
+            if exc.code is None or isinstance(exc.code, int):
+                status = exc.code or 0
+            else:
+                print(exc.code, file=sys.stderr)
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(status)
+
+
+def kill(job, error):
+    if job.error is None:
+        job.error = error
+        job.deadline = None
+        try:
+            os.kill(job.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def reap(jobs):
+    """Removes the jobs whose child has exited from `jobs` and returns them."""
+    done = []
+    while jobs:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid == 0:
+            break
+        job = jobs.pop(pid, None)
+        if job is not None:
+            job.status = os.waitstatus_to_exitcode(status)
+            done.append(job)
+    return done
+
+
+def finish(job):
+    status = job.status
+    error = job.error
+    if status < 0:
+        error = error or f"killed by signal {-status}"
+        status = 1
+    elif error is not None:
+        status = 1
+    reply(job.conn, status, error)
+    job.conn.close()
+
+
+def reply(conn, status, error=None):
+    try:
+        conn.sendall(pack([str(status), error or ""]))
+    except OSError:
+        pass
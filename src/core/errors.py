@@ -1,24 +1,37 @@
-class Error:
+class Error(Exception):
     """Base class for exceptions in this module."""
     def __init__(self, name, msg, pos_start, pos_end = None):
         self.name = name
         self.msg = msg
         self.pos_start = pos_start
         self.pos_end = pos_end
+        self.source = None
+
+    def set_source(self, source):
+        # The stage closest to the error knows the source best, keep its one.
+        if self.source is None:
+            self.source = source
+        return self
 
     def __str__(self):
-        error_string = f"{self.name}: {self.msg}.\n{self.pos_start}\n{self.pos_end}"
+        if self.source is None:
+            pos_start = f"At offset {self.pos_start}"
+            pos_end = None if self.pos_end is None else f"At offset {self.pos_end}"
+        else:
+            pos_start = self.source.position(self.pos_start)
+            pos_end = None if self.pos_end is None else self.source.end_position(self.pos_end)
+        error_string = f"{self.name}: {self.msg}.\n{pos_start}\n{pos_end}"
 
         return error_string
 
 
 class UnknownCharError(Error):
     def __init__(self, msg, pos_start):
-        super().__init__("Unknown Charecter Error", msg, pos_start, pos_start.copy().advance())
+        super().__init__("Unknown Charecter Error", msg, pos_start, pos_start + 1)
 
 class InvalidCharError(Error):
     def __init__(self, msg, pos_start):
-        super().__init__("Invalid Charecter Error", msg, pos_start, pos_start.copy().advance())
+        super().__init__("Invalid Charecter Error", msg, pos_start, pos_start + 1)
 
 class InvalidSyntaxError(Error):
     def __init__(self, msg, pos_start, pos_end):
@@ -32,6 +45,10 @@ class DivisionByZeroError(Error):
     def __init__(self, msg, pos_start, pos_end):
         super().__init__("Division By Zero Error", msg, pos_start, pos_end)
 
+class BudgetExceededError(Error):
+    def __init__(self, msg, pos_start, pos_end):
+        super().__init__("Budget Exceeded Error", msg, pos_start, pos_end)
+
 class IdentifierError(Error):
     def __init__(self, msg, pos_start, pos_end, context):
         super().__init__(f"Identifier Error", msg, pos_start, pos_end)
@@ -0,0 +1,105 @@
+from collections import deque
+
+# Characters of a string `preview` shows.
+PREVIEW_LIMIT = 80
+
+
+def preview(values, end="", limit=PREVIEW_LIMIT):
+    """The repr of the text `say` writes for `values` and `end`, cut after `limit` characters.
+
+    Strings are read piece by piece, a long rope is never made into one
+    string. A cut text is followed by "...", outside the quotes.
+    """
+    parts = []
+    left = limit
+    for i, value in enumerate(values):
+        if i:
+            parts.append(" ")
+            left -= 1
+        # Only Strings have pieces, Numbers are short.
+        for piece in value.pieces() if hasattr(value, "pieces") else (str(value),):
+            if len(piece) > left:
+                parts.append(piece[:max(left, 0)])
+                return repr("".join(parts)) + "..."
+            parts.append(piece)
+            left -= len(piece)
+    return repr("".join(parts) + end)
+
+
+class Hooks:
+    """What the tree walker tells about a run, for tracing, auditing and debugging.
+
+    Subclass it, override the hooks wanted (the others do nothing) and give
+    an instance to `Interpreter(source, output, hooks)` or `Program.run`.
+    An interpreter without hooks does not check for them, so they cost
+    nothing until installed.
+
+    Every hook gets the span of the node it is about as `pos_start` and
+    `pos_end`, offsets into the program's source like those on the AST.
+    `source` is set to that core.position_manager.Source when the hooks are
+    installed: `self.source.position(pos_start)` has the line and column.
+    The hooks run inside the interpreter, an exception they raise ends the run.
+    """
+
+    source = None
+
+    def on_statement(self, node, pos_start, pos_end):
+        """A top-level statement `node` is about to run."""
+
+    def on_assign(self, name, value, pos_start, pos_end):
+        """The variable `name` was assigned `value`, a Number or String."""
+
+    def on_output(self, values, end, pos_start, pos_end):
+        """A `say` wrote `values`, Numbers and Strings, separated by spaces and followed by `end`.
+
+        `end` is a line break, or a space when the `say` failed part way.
+        Long Strings are ropes, `value.value` would make their whole text:
+        see `preview` for a look at it that does not.
+        """
+
+    def on_error(self, error, pos_start, pos_end):
+        """The run stopped at the PENG `error`."""
+
+
+class TraceRecorder(Hooks):
+    """Hooks keeping the last `size` events of a run in a ring buffer.
+
+    Recording an event only appends a tuple, so a recorder can stay on in
+    production and be looked at when something went wrong: `events` holds
+    (kind, pos_start, detail) tuples, oldest first, `format()` makes them
+    readable. Offsets are turned into lines then, against `source`.
+    """
+
+    def __init__(self, size=1000):
+        self.events = deque(maxlen=size)
+
+    def on_statement(self, node, pos_start, pos_end):
+        self.events.append(("statement", pos_start, type(node).__name__))
+
+    def on_assign(self, name, value, pos_start, pos_end):
+        # Values are immutable, keeping them is safe.
+        self.events.append(("assign", pos_start, (name, value)))
+
+    def on_output(self, values, end, pos_start, pos_end):
+        self.events.append(("output", pos_start, (values, end)))
+
+    def on_error(self, error, pos_start, pos_end):
+        self.events.append(("error", pos_start, error))
+
+    def clear(self):
+        self.events.clear()
+
+    def format(self):
+        """The events as text, one per line, with their source line numbers."""
+        out = []
+        for kind, pos_start, detail in self.events:
+            ln = self.source.position(pos_start).ln if self.source is not None and pos_start is not None else "?"
+            if kind == "assign":
+                name, value = detail
+                detail = f"{name} = {preview([value]) if hasattr(value, 'pieces') else repr(value.value)}"
+            elif kind == "output":
+                detail = preview(*detail)
+            elif kind == "error":
+                detail = f"{detail.name}: {detail.msg}"
+            out.append(f"line {ln:>5}  {kind:<9} {detail}")
+        return "\n".join(out)
@@ -1,87 +1,181 @@
-from webbrowser import get
-from core.errors import DivisionByZeroError, IdentifierError, InvalidOperationError, Error
+import sys
+from time import perf_counter
+
+from core.errors import BudgetExceededError, DivisionByZeroError, IdentifierError, InvalidOperationError, Error
+from core.parser import (
+    BinOpNode, ExpressionNode, NumberNode, PrintNode, StringNode,
+    UnaryOpNode, VarAsgnNode, VarGetNode, postorder
+)
+from core.output import StreamSink
 from core.tokens import TOK_DIV, TOK_MINUS, TOK_MUL, TOK_PLUS
 
 class Number:
+    """An immutable PENG number.
+
+    Values carry no position: the operations take the span to report from
+    the caller, which has it on the AST node. A value can so be shared by any
+    number of variables and reads.
+    """
+    __slots__ = ("value",)
+
     def __init__(self, value) -> None:
         self.value = value
 
     def __str__(self) -> str:
         return str(self.value)
 
-    def set_pos(self, pos_start, pos_end):
-        self.pos_start = pos_start
-        self.pos_end = pos_end
-        return self
-
-    def set_context(self, context):
-        self.context = context
-        return self
-
-    def copy(self):
-        return Number(self.value)
-
-    def add(self, num):
+    def add(self, num, pos_start, pos_end):
         if not isinstance(num, Number):
-            return InvalidOperationError(f"Cant add Num with {type(num).__name__}!", self.pos_start, num.pos_end)
-        return Number(self.value + num.value)
+            raise InvalidOperationError(f"Cant add Num with {type(num).__name__}!", pos_start, pos_end)
+        return number(self.value + num.value)
 
-    def sub(self, num):
+    def sub(self, num, pos_start, pos_end):
         if not isinstance(num, Number):
-            return InvalidOperationError(f"Cant add Num with {type(num).__name__}!", self.pos_start, num.pos_end)
-        return Number(self.value - num.value)
+            raise InvalidOperationError(f"Cant add Num with {type(num).__name__}!", pos_start, pos_end)
+        return number(self.value - num.value)
 
-    def mul(self, num):
+    def mul(self, num, pos_start, pos_end):
         if isinstance(num, String):
-            return String(num.value * self.value)
+            if not isinstance(self.value, int):
+                raise InvalidOperationError("Cant multiply String with a decimal Num", pos_start, pos_end)
+            return String.repeat(num, self.value)
         if not isinstance(num, Number):
-            return InvalidOperationError(f"Cant add Num with {type(num).__name__}!", self.pos_start, num.pos_end)
-        return Number(self.value * num.value)
+            raise InvalidOperationError(f"Cant add Num with {type(num).__name__}!", pos_start, pos_end)
+        return number(self.value * num.value)
 
-    def div(self, num):
+    def div(self, num, pos_start, pos_end):
+        if not isinstance(num, Number):
+            raise InvalidOperationError(f"Cant divide Num with {type(num).__name__}!", pos_start, pos_end)
         if num.value == 0:
-            return DivisionByZeroError("Bruh...", self.token.pos_start, num.token.pos_end)
+            raise DivisionByZeroError("Bruh...", pos_start, pos_end)
         return Number(self.value / num.value)
 
+    def neg(self, pos_start, pos_end):
+        return number(-self.value)
+
 
 class String:
+    """An immutable PENG string, see Number.
+
+    Concatenating or repeating long strings copies nothing: the result is a
+    rope node over its operands, so growing a string one piece at a time is
+    linear instead of quadratic. `value` flattens a rope the first time the
+    text is needed. Printing walks the pieces instead, see `pieces`.
+    """
+    __slots__ = ("_value", "left", "right", "count", "length")
+
     def __init__(self, value) -> None:
-        self.value = value
+        self._value = value
+        self.left = None
+        self.right = None
+        self.count = 0
+        self.length = len(value)
+
+    @classmethod
+    def concat(cls, left, right):
+        if left.length + right.length <= FLAT_STRING_MAX:
+            # Both are flat, ropes are only made for longer strings.
+            return cls(left._value + right._value)
+        rope = cls.__new__(cls)
+        rope._value = None
+        rope.left = left
+        rope.right = right
+        rope.count = 0
+        rope.length = left.length + right.length
+        return rope
+
+    @classmethod
+    def repeat(cls, string, count):
+        if count <= 0:
+            return cls("")
+        if string.length * count <= FLAT_STRING_MAX:
+            return cls(string._value * count)
+        rope = cls.__new__(cls)
+        rope._value = None
+        rope.left = string
+        rope.right = None
+        rope.count = count
+        rope.length = string.length * count
+        return rope
+
+    @property
+    def value(self):
+        if self._value is None:
+            self._value = "".join(self.pieces())
+            # Flat now, the operands can go.
+            self.left = self.right = None
+        return self._value
+
+    def is_rope(self):
+        return self._value is None
+
+    def pieces(self):
+        """Yields the text in order, in chunks, without flattening the rope."""
+        stack = [self]
+        while stack:
+            string = stack.pop()
+            if string._value is not None:
+                yield string._value
+            elif string.right is not None:
+                stack.append(string.right)
+                stack.append(string.left)
+            else:
+                # Repeats go out in chunks of about PIECE_SIZE characters.
+                text = string.left.value
+                per_chunk = max(1, PIECE_SIZE // max(1, len(text)))
+                chunks, rest = divmod(string.count, per_chunk)
+                chunk = text * per_chunk if chunks else ""
+                for _ in range(chunks):
+                    yield chunk
+                if rest:
+                    yield text * rest
 
     def __str__(self) -> str:
         return self.value
 
-    def set_pos(self, pos_start, pos_end):
-        self.pos_start = pos_start
-        self.pos_end = pos_end
-        return self
+    def add(self, string, pos_start, pos_end):
+        if not isinstance(string, String):
+            raise InvalidOperationError(f"Cant concatenate String with {type(string).__name__}!", pos_start, pos_end)
+        return String.concat(self, string)
 
-    def set_context(self, context):
-        self.context = context
-        return self
+    def sub(self, node, pos_start, pos_end):
+        raise InvalidOperationError("'-' is not supported for type String", pos_start, pos_end)
 
-    def copy(self):
-        return String(self.value)
+    def mul(self, num, pos_start, pos_end):
+        if not isinstance(num, Number):
+            raise InvalidOperationError(f"Cant multiply String with {type(num).__name__}", pos_start, pos_end)
+        if not isinstance(num.value, int):
+            raise InvalidOperationError("Cant multiply String with a decimal Num", pos_start, pos_end)
+        return String.repeat(self, num.value)
 
-    def add(self, string):
-        if not isinstance(string, String):
-            return InvalidOperationError(f"Cant concatenate String with {type(string).__name__}!", self.pos_start, string.pos_end)
-        return String(self.value + string.value)
+    def div(self, node, pos_start, pos_end):
+        raise InvalidOperationError("'/' is not supported for type String", pos_start, pos_end)
 
-    def sub(self, node):
-        return InvalidOperationError("'-' is not supported for type String", self.pos_start, node.pos_end)
+    def neg(self, pos_start, pos_end):
+        raise InvalidOperationError("'-' is not supported for type String", pos_start, pos_end)
 
-    def mul(self, num):
-        if not isinstance(num, Number):
-            return InvalidOperationError(f"Cant multiply String with {type(num).__name__}", self.pos_start, num.pos_end)
-        return String(self.value * num.value)
 
-    def div(self, node):
-        return InvalidOperationError("'/' is not supported for type String", self.pos_start, node.pos_end)
+# Strings up to this long are always flat: copying them is cheaper than a
+# rope node. Longer ones are ropes until something needs the text.
+FLAT_STRING_MAX = 256
+PIECE_SIZE = 1 << 16
 
+# Like CPython, one shared Number per small int: loop counters, indexes and
+# the like then never allocate.
+SMALL_INTS = tuple(Number(i) for i in range(-5, 257))
 
+def number(value):
+    if type(value) is int and -5 <= value <= 256:
+        return SMALL_INTS[value + 5]
+    return Number(value)
 
 
+# Frame entry of a variable that has a slot but was never assigned.
+UNSET = object()
+
+# Nodes `Interpreter.evaluate` walks itself.
+OPERATOR_NODES = (BinOpNode, UnaryOpNode)
+
 
 class Context:
     def __init__(self, display_name, parent=None, parent_entry_pos=None):
@@ -89,32 +183,28 @@ class Context:
         self.parent = parent
         self.parent_entry_pos = parent_entry_pos
         self.symbol_table = None
+        # Variable values, indexed by the slots in symbol_table.
+        self.frame = []
+
+    def grow_frame(self, size):
+        if len(self.frame) < size:
+            self.frame.extend([UNSET] * (size - len(self.frame)))
 
 
 class SymbolTable:
+    """Maps variable names to their slot in a Context's frame."""
+
     def __init__(self):
-        self.symbols = {}
-        self.parent = None
+        self.slots = {}
 
     def get(self, name):
-        value, _ = self._get(name)
-        return value
+        return self.slots.get(name)
 
-    def _get(self, name):
-        value = self.symbols.get(name, None)
-        if value == None and self.parent:
-            return self.parent.get(name)
-        return value, self
-
-    def set(self, name, value):
-        return_val, table = self._get(name)
-        if return_val:
-            table.symbols[name] = value
-        else:
-            self.symbols[name] = value
-
-    def remove(self, name):
-        del self.symbols[name]
+    def define(self, name):
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.slots)
+        return slot
 
 
 class RTResult:
@@ -122,13 +212,8 @@ class RTResult:
         self.error = None
         self.value = None
 
-    def register(self, res):
-        if hasattr(res, "value"):
-            return res.value
-        return res
-
-    def success(self, node):
-        self.value = node
+    def success(self, value):
+        self.value = value
         return self
 
     def failure(self, error):
@@ -136,90 +221,365 @@ class RTResult:
         return self
 
 class Interpreter:
+    """Tree walking engine.
+
+    Handlers are looked up by node class in a table built once per
+    interpreter, and PENG errors are raised as `Error` exceptions. Only
+    `interpret` catches them, it returns an RTResult with the value or error.
+    The AST must have been through the Resolver for the same Context:
+    variables are read and written by slot in `context.frame`.
+
+    `hooks` (see core.hooks.Hooks) are told of every statement, assignment,
+    output and error. Only the handlers that call them are swapped into the
+    table, so an interpreter without hooks runs exactly as fast as before.
+    A `budget` (see core.budget.Budget) is enforced the same way, by
+    handlers that only an interpreter with a budget uses.
+    """
+
+    NODE_CLASSES = (
+        NumberNode, StringNode, BinOpNode, UnaryOpNode,
+        VarAsgnNode, VarGetNode, PrintNode, ExpressionNode,
+    )
+
+    def __init__(self, source=None, output=None, hooks=None, budget=None):
+        self.source = source
+        # Left unflushed at the end of `interpret`, the caller owns it.
+        self.output = output if output is not None else StreamSink(sys.stdout, 0)
+        self.hooks = hooks
+        self.budget = None
+        self.dispatch = {
+            node_class: getattr(self, f"visit_{node_class.__name__}")
+            for node_class in self.NODE_CLASSES
+        }
+        if hooks is not None:
+            hooks.source = source
+            self.dispatch[ExpressionNode] = self.hooked_ExpressionNode
+            self.dispatch[VarAsgnNode] = self.hooked_VarAsgnNode
+            self.dispatch[PrintNode] = self.hooked_PrintNode
+        if budget is not None:
+            self.set_budget(budget)
+
+    def set_budget(self, budget):
+        # Statements are only ever assignments and `say`, and there are no
+        # loops: a statement evaluates each of its nodes once. So the budget
+        # is charged and checked once per statement, never per node.
+        self.budget = budget
+        self.deadline = None if budget.time_limit is None else perf_counter() + budget.time_limit
+        self.nodes_left = float("inf") if budget.max_nodes is None else budget.max_nodes
+        self.output_left = float("inf") if budget.max_output is None else budget.max_output
+        self.max_string_length = float("inf") if budget.max_string_length is None else budget.max_string_length
+        self.statement = None
+        self.dispatch[ExpressionNode] = self.budgeted_ExpressionNode
+        if budget.max_string_length is not None:
+            # Every String made or assigned is measured before it is kept.
+            # Long ones are ropes until then, so nothing was allocated yet.
+            self.apply = self.budgeted_apply
+            self.dispatch[VarAsgnNode] = self.budgeted_VarAsgnNode
+        if budget.max_output is not None or budget.max_string_length is not None or budget.time_limit is not None:
+            self.write_values = self.budgeted_write_values
 
     def interpret(self, ast, context):
         res = RTResult()
-        res.register(self.visit(ast, context, res))
-        if res.error:
-            print(res.error)
-            exit(1)
-
-    def visit(self, node, context, res):
-        def visit_error(): raise RuntimeError(f"Visit Method Not Available for node {type(node).__name__}")
-        func = getattr(self, f"visit_{type(node).__name__}", visit_error)
-        return func(node, context, res)
-
-    def visit_NumberNode(self, node, context, res):
-        return res.success(
-            Number(node.num).set_pos(node.pos_start, node.pos_end).set_context(context)
-        )
+        try:
+            return res.success(self.visit(ast, context))
+        except Error as error:
+            error.set_source(self.source)
+            if self.hooks is not None:
+                self.hooks.on_error(error, error.pos_start, error.pos_end)
+            return res.failure(error)
+
+    # `compile`, `execute` and `read_variables` are what every engine offers for
+    # running one program many times (see core.program): `compile` once, then
+    # `execute` on a fresh engine and Context per run.
+
+    def compile(self, ast):
+        return ast
+
+    def execute(self, ast, context, bindings):
+        """`interpret`, with the {name: Number/String} `bindings` assigned first."""
+        slots = context.symbol_table.slots
+        for name, value in bindings.items():
+            context.frame[slots[name]] = value
+        return self.interpret(ast, context)
+
+    def read_variables(self, ast, context):
+        """The {name: Number/String} of every variable that has a value."""
+        frame = context.frame
+        return {name: frame[slot] for name, slot in context.symbol_table.slots.items() if frame[slot] is not UNSET}
+
+    def interpret_stream(self, statements, context):
+        # Each statement is run and dropped before the next one is parsed.
+        res = RTResult()
+        hooks = self.hooks
+        budget = self.budget
+        for statement in statements:
+            if isinstance(statement, Error):
+                if hooks is not None:
+                    hooks.on_error(statement, statement.pos_start, statement.pos_end)
+                return res.failure(statement)
+            if budget is not None:
+                # Charged (and told to the hooks) by budgeted_ExpressionNode.
+                res = self.interpret(ExpressionNode([statement]), context)
+            else:
+                if hooks is not None:
+                    hooks.on_statement(statement, statement.pos_start, statement.pos_end)
+                res = self.interpret(statement, context)
+            if res.error:
+                return res
+        return res
 
-    def visit_StringNode(self, node, context, res):
-        return res.success(
-            String(node.str_val).set_pos(node.pos_start, node.pos_end).set_context(context)
-        )
+    def visit(self, node, context):
+        try:
+            func = self.dispatch[type(node)]
+        except KeyError:
+            raise RuntimeError(f"Visit Method Not Available for node {type(node).__name__}") from None
+        return func(node, context)
+
+    def visit_NumberNode(self, node, context):
+        value = node.value
+        if value is None:
+            value = node.value = number(node.num)
+        return value
+
+    def visit_StringNode(self, node, context):
+        value = node.value
+        if value is None:
+            value = node.value = String(node.str_val)
+        return value
+
+    def visit_BinOpNode(self, node, context):
+        left = node.left
+        right = node.right
+        if type(left) not in OPERATOR_NODES and type(right) not in OPERATOR_NODES:
+            # Most operators, no stack needed.
+            visit = self.visit
+            return self.apply(node, visit(left, context), visit(right, context))
+        return self.evaluate(node, context)
+
+    def evaluate(self, node, context):
+        """The value of the operator `node`, without recursing however deep it is nested.
+
+        Operands leave their values on `values` for their operator.
+        """
+        dispatch = self.dispatch
+        apply = self.apply
+        values = []
+        for node in postorder(node):
+            node_type = type(node)
+            if node_type is BinOpNode:
+                right = values.pop()
+                values[-1] = apply(node, values[-1], right)
+            elif node_type is UnaryOpNode:
+                values[-1] = self.unary(node, values[-1])
+            else:
+                values.append(dispatch[node_type](node, context))
+        return values[0]
+
+    def apply(self, node, left, right):
+        # Errors span both operands.
+        op = node.op.type
+        if op == TOK_PLUS:
+            return left.add(right, node.left.pos_start, node.right.pos_end)
+        elif op == TOK_MINUS:
+            return left.sub(right, node.left.pos_start, node.right.pos_end)
+        elif op == TOK_MUL:
+            return left.mul(right, node.left.pos_start, node.right.pos_end)
+        elif op == TOK_DIV:
+            return left.div(right, node.left.pos_start, node.right.pos_end)
+
+    def visit_UnaryOpNode(self, node, context):
+        if type(node.node) in OPERATOR_NODES:
+            return self.evaluate(node, context)
+        return self.unary(node, self.visit(node.node, context))
+
+    def unary(self, node, value):
+        # Errors span the operand.
+        if node.op.type == TOK_MINUS:
+            return value.neg(node.node.pos_start, node.node.pos_end)
+        return value
 
-    def visit_BinOpNode(self, node, context, res):
-        left = res.register(self.visit(node.left, context, res))
-        if res.error: return res
-        right = res.register(self.visit(node.right, context, res))
-        if res.error: return res
-
-        if node.op.type == TOK_PLUS:
-            val = left.add(right)
-        elif node.op.type == TOK_MINUS:
-            val = left.sub(right)
-        elif node.op.type == TOK_MUL:
-            val = left.mul(right)
-        elif node.op.type == TOK_DIV:
-            val = left.div(right)
-
-        if isinstance(val, Error):
-            return res.failure(val)
-        return res.success(val.set_pos(node.pos_start, node.pos_end))
-
-    def visit_UnaryOpNode(self, node, context, res):
-        number = res.register(self.visit(node.node, context, res))
-        if res.error: return res
-
-        if (node.op.type == TOK_MINUS and number.value < 0) \
-            or (node.op.type == TOK_PLUS and number.value > 0):
-            val = number.mul(Number(-1))
-
-        if isinstance(val, Error):
-            return res.failure(val)
-        return res.success(val.set_pos(node.pos_start, node.pos_end))
-
-    def visit_VarAsgnNode(self, node, context, res):
-        name = node.name
-        value = res.register(self.visit(node.node, context, res))
-        if res.error: return res
-
-        context.symbol_table.set(name, value)
-        return res.success(value)
-
-    def visit_VarGetNode(self, node, context, res):
-        name = node.name
-        value = context.symbol_table.get(name)
-
-        if not value:
-            return res.failure(IdentifierError(
-                f"Identifier {name} not defined!",
+    def visit_VarAsgnNode(self, node, context):
+        value = self.visit(node.node, context)
+        context.frame[node.slot] = value
+        return value
+
+    def visit_VarGetNode(self, node, context):
+        value = context.frame[node.slot]
+
+        # Only when an earlier statement run on this Context failed, the
+        # Resolver already rejected names that are never assigned.
+        if value is UNSET:
+            raise IdentifierError(
+                f"Identifier {node.name} not defined!",
                 node.name_token.pos_start,
                 node.name_token.pos_end,
                 context
-            ))
+            )
+
+        return value
+
+    def visit_PrintNode(self, print_node, context):
+        visit = self.visit
+        values = []
+        try:
+            for node in print_node.nodes:
+                values.append(visit(node, context))
+        except Error:
+            # The values before the error are still printed, as the VM does.
+            if values:
+                self.write_values(values, " ")
+            raise
+        self.write_values(values, "\n")
+
+    def write_values(self, values, end):
+        for value in values:
+            if type(value) is String and value.is_rope():
+                break
+        else:
+            # One write per line.
+            self.output.write(" ".join(map(str, values)) + end)
+            return
+
+        # Ropes are written piece by piece, never flattened.
+        write = self.output.write
+        for i, value in enumerate(values):
+            if i:
+                write(" ")
+            if type(value) is String:
+                for piece in value.pieces():
+                    write(piece)
+            else:
+                write(str(value))
+        write(end)
+
+    def visit_ExpressionNode(self, expression, context):
+        visit = self.visit
+        for statement in expression.statements:
+            visit(statement, context)
 
-        value = value.copy().set_pos(node.pos_start, node.pos_end)
-        return res.success(value)
+    # The handlers used instead of the visit_ ones above when there are hooks
+    # or a budget.
 
-    def visit_PrintNode(self, print_node, context, res):
-        for i, node in enumerate(print_node.nodes):
-            value = res.register(self.visit(node, context, res))
-            if res.error: return res
-            print(value, end="\n" if i == len(print_node.nodes) - 1 else " ")
+    def hooked_ExpressionNode(self, expression, context):
+        visit = self.visit
+        on_statement = self.hooks.on_statement
+        for statement in expression.statements:
+            on_statement(statement, statement.pos_start, statement.pos_end)
+            visit(statement, context)
+
+    def hooked_VarAsgnNode(self, node, context):
+        value = self.visit_VarAsgnNode(node, context)
+        self.hooks.on_assign(node.name, value, node.pos_start, node.pos_end)
+        return value
 
-    def visit_ExpressionNode(self, expression, context, res):
+    def hooked_PrintNode(self, print_node, context):
+        visit = self.visit
+        values = []
+        try:
+            for node in print_node.nodes:
+                values.append(visit(node, context))
+        except Error:
+            if values:
+                self.write_values(values, " ")
+                self.hooks.on_output(values, " ", print_node.pos_start, print_node.pos_end)
+            raise
+        self.write_values(values, "\n")
+        self.hooks.on_output(values, "\n", print_node.pos_start, print_node.pos_end)
+
+    def budgeted_ExpressionNode(self, expression, context):
+        visit = self.visit
+        hooks = self.hooks
+        budget = self.budget
+        deadline = self.deadline
         for statement in expression.statements:
-            res.register(self.visit(statement, context, res))
-            if res.error: return res
+            size = getattr(statement, "size", None)
+            if size is None:
+                # Kept on the node like NumberNode.value, for the next run.
+                size = statement.size = count_nodes(statement)
+            self.nodes_left -= size
+            if self.nodes_left < 0:
+                raise BudgetExceededError(
+                    f"Evaluating more than the {budget.max_nodes} nodes allowed",
+                    statement.pos_start, statement.pos_end
+                )
+            self.statement = statement
+            if deadline is not None and perf_counter() > deadline:
+                raise self.out_of_time()
+            if hooks is not None:
+                hooks.on_statement(statement, statement.pos_start, statement.pos_end)
+            visit(statement, context)
+
+    def budgeted_apply(self, node, left, right):
+        value = Interpreter.apply(self, node, left, right)
+        if type(value) is String:
+            self.check_length(value, node.pos_start, node.pos_end)
+        return value
+
+    def budgeted_VarAsgnNode(self, node, context):
+        value = self.visit(node.node, context)
+        if type(value) is String:
+            self.check_length(value, node.node.pos_start, node.node.pos_end)
+        context.frame[node.slot] = value
+        if self.hooks is not None:
+            self.hooks.on_assign(node.name, value, node.pos_start, node.pos_end)
+        return value
+
+    def budgeted_write_values(self, values, end):
+        for value in values:
+            if type(value) is String and (value.is_rope() or value.length > self.max_string_length):
+                break
+        else:
+            # Made once, measured, then written as the plain write_values would.
+            text = " ".join(map(str, values)) + end
+            self.spend_output(len(text))
+            self.output.write(text)
+            return
+
+        size = len(values) - 1 + len(end)
+        for value in values:
+            if type(value) is String:
+                self.check_length(value, self.statement.pos_start, self.statement.pos_end)
+                size += value.length
+            else:
+                size += len(str(value))
+        self.spend_output(size)
+
+        # As the plain write_values does, with the deadline checked between
+        # pieces: writing one rope can take any time.
+        deadline = self.deadline
+        write = self.output.write
+        for i, value in enumerate(values):
+            if i:
+                write(" ")
+            if type(value) is String:
+                for piece in value.pieces():
+                    if deadline is not None and perf_counter() > deadline:
+                        raise self.out_of_time()
+                    write(piece)
+            else:
+                write(str(value))
+        write(end)
+
+    def check_length(self, string, pos_start, pos_end):
+        if string.length > self.max_string_length:
+            raise BudgetExceededError(
+                f"String of {string.length} characters is longer than the {self.budget.max_string_length} allowed",
+                pos_start, pos_end
+            )
+
+    def out_of_time(self):
+        return BudgetExceededError(
+            f"Ran past its time limit of {self.budget.time_limit}s", self.statement.pos_start, self.statement.pos_end
+        )
+
+    def spend_output(self, size):
+        if size > self.output_left:
+            raise BudgetExceededError(
+                f"Output past the {self.budget.max_output} characters allowed",
+                self.statement.pos_start, self.statement.pos_end
+            )
+        self.output_left -= size
+
+def count_nodes(node):
+    """The number of nodes in the tree under `node`, itself included."""
+    return sum(1 for _ in postorder(node))
@@ -1,161 +1,264 @@
-from string import ascii_letters, digits
+import re
+from sys import intern
 from .errors import InvalidCharError, InvalidSyntaxError, UnknownCharError, Error
-from .position_manager import Position
+from .position_manager import Source
 from .tokens import *
 
 
-DIGITS = digits
-LETTERS = ascii_letters + digits + "_"
-        
+# One alternative per lexeme class. Every group is anchored at the current
+# offset, so a failed match means the character there starts no valid token.
+TOKEN_RE = re.compile(r"""
+    (?P<SPACE>[ \t]+)
+  | (?P<NUM>[0-9][0-9.]*)
+  | (?P<WORD>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<STRING>"[^"\\\n]*(?:\\(?:[\\tnrvf]|(?![\\tnrvf]))[^"\\\n]*)*")
+  | (?P<SYMBOL>[-+*/(),])
+  | (?P<NEWLINE>\n)
+""", re.VERBOSE)
+
+ESCAPE_RE = re.compile(r"\\([\\tnrvf]?)")
+ESCAPES = {"\\": "\\", "t": "\t", "n": "\n", "r": "\r", "v": "\v", "f": "\f", "": ""}
+
+# Token values reuse these strings instead of a fresh slice per symbol.
+SYMBOLS = {
+    "+": (TOK_PLUS, "+"),
+    "-": (TOK_MINUS, "-"),
+    "*": (TOK_MUL, "*"),
+    "/": (TOK_DIV, "/"),
+    "(": (TOK_LPAREN, "("),
+    ")": (TOK_RPAREN, ")"),
+    ",": (TOK_COMMA, ","),
+}
+
+# Characters of code in a chunk of `Lexer.iter_tokens_parallel`.
+PARALLEL_CHUNK_SIZE = 1 << 20
+
+
+def split_lines(code, size):
+    """Yields (offset, text) chunks of `code` of about `size` characters, each ending at a line break."""
+    start = 0
+    end = len(code)
+    while start < end:
+        stop = code.find("\n", start + size)
+        stop = end if stop == -1 else stop + 1
+        yield start, code[start:stop]
+        start = stop
+
+
+def lex_columns(base, code, file_name):
+    """Lexes the chunk `code` at offset `base` in a worker of `Lexer.iter_tokens_parallel`.
+
+    Returns its tokens as (types, values, starts, ends) lists, which pickle
+    far smaller and faster than the Tokens do, or None if it has an error.
+    """
+    tokens = Lexer(code, file_name)._lex_at(base, code)
+    if isinstance(tokens, Error):
+        return None
+    return ([token.type for token in tokens], [token.value for token in tokens],
+            [token.pos_start for token in tokens], [token.pos_end for token in tokens])
+
 
 class Lexer:
 
     def __init__(self, code:str, file_name):
         self.code = code
-        self.pos = Position(0, 1, 1, file_name, code)
-        self.cur_char = self.code[self.pos.idx]
+        self.file_name = file_name
+        self.source = Source(code, file_name)
+        self.stream = None
+        self.base = 0
 
-    def advance(self):
-        self.pos.advance(self.cur_char)
-        self.cur_char = self.code[self.pos.idx] if self.pos.idx < len(self.code) else None
+    @classmethod
+    def from_stream(cls, stream, file_name):
+        """Lexer that reads `stream` one line at a time, see `iter_tokens`."""
+        lexer = cls("", file_name)
+        lexer.stream = stream
+        return lexer
 
     def lex(self):
-        tokens = []
+        tokens = self._lex_chunk(self.code)
+        if isinstance(tokens, Error):
+            return tokens
+        tokens.append(Token(TOK_EOF, pos_start=len(self.code)))
+        return tokens
 
-        while self.cur_char is not None:
+    def iter_tokens(self):
+        """Yields tokens lazily, ending with EOF or with the first lexing Error.
 
-            if self.cur_char in " \t":
-                self.advance()
+        Each line is lexed completely before any of its tokens are handed out,
+        so an Error is only ever yielded at the start of a line.
+        """
+        if self.stream is None:
+            tokens = self.lex()
+            if isinstance(tokens, Error):
+                yield tokens
+            else:
+                yield from tokens
+            return
 
-            elif self.cur_char.isdigit():
-                token = self._parse_num()
-                if isinstance(token, Error):
-                    return token
-                tokens.append(token)
+        for chunk in self.stream:
+            tokens = self.feed(chunk)
+            if isinstance(tokens, Error):
+                yield tokens
+                return
+            yield from tokens
+        yield Token(TOK_EOF, pos_start=self.source.base + len(self.source.text))
 
-            elif self.cur_char in LETTERS:
-                tokens.append(self._parse_letters())
+    def lex_parallel(self, jobs, chunk_size=PARALLEL_CHUNK_SIZE):
+        """`lex`, with the code lexed on `jobs` worker processes, see `iter_tokens_parallel`."""
+        tokens = list(self.iter_tokens_parallel(jobs, chunk_size))
+        if isinstance(tokens[-1], Error):
+            return tokens[-1]
+        return tokens
 
-            elif self.cur_char == "\"":
-                token = self._parse_string()
-                if isinstance(token, Error): return token
-                tokens.append(token)
+    def iter_tokens_parallel(self, jobs, chunk_size=PARALLEL_CHUNK_SIZE):
+        """Yields the tokens of `iter_tokens`, with the code lexed on `jobs` worker processes.
 
-            elif self.cur_char == "+":
-                tokens.append(Token(TOK_PLUS, self.cur_char, pos_start=self.pos.copy()))
-                self.advance()
+        No token spans a line break (strings stop at the end of the line), so
+        the code is cut at line breaks into chunks of about `chunk_size`
+        characters that lex on their own, offsets starting where they do.
+        Tokens come out in source order while the workers lex at most
+        2 * `jobs` chunks ahead, so memory stays bounded on huge sources.
+        The Error ending them is the earliest one, as with `lex`: the first
+        chunk with an error is lexed again here to find it.
 
-            elif self.cur_char == "-":
-                tokens.append(Token(TOK_MINUS, self.cur_char, pos_start=self.pos.copy()))
-                self.advance()
+        The Tokens are made again from what the workers send back, in this
+        process, which bounds the speedup. With `jobs` 1 or code of a single
+        chunk, the chunks are lexed here in turn.
+        """
+        chunks = split_lines(self.code, chunk_size)
+        if jobs <= 1 or len(self.code) <= chunk_size:
+            for base, chunk in chunks:
+                tokens = self._lex_at(base, chunk)
+                if isinstance(tokens, Error):
+                    yield tokens
+                    return
+                yield from tokens
+            yield Token(TOK_EOF, pos_start=len(self.code))
+            return
 
-            elif self.cur_char == "*":
-                tokens.append(Token(TOK_MUL, self.cur_char, pos_start=self.pos.copy()))
-                self.advance()
+        from collections import deque
+        from concurrent.futures import ProcessPoolExecutor
 
-            elif self.cur_char == "/":
-                tokens.append(Token(TOK_DIV, self.cur_char, pos_start=self.pos.copy()))
-                self.advance()
+        pool = ProcessPoolExecutor(jobs)
+        pending = deque()
+        try:
+            for base, chunk in chunks:
+                pending.append((base, chunk, pool.submit(lex_columns, base, chunk, self.file_name)))
+                if len(pending) < 2 * jobs:
+                    continue
+                error = yield from self._merge(*pending.popleft())
+                if error:
+                    return
+            while pending:
+                error = yield from self._merge(*pending.popleft())
+                if error:
+                    return
+            yield Token(TOK_EOF, pos_start=len(self.code))
+        finally:
+            pool.shutdown(cancel_futures=True)
 
-            elif self.cur_char == "(":
-                tokens.append(Token(TOK_LPAREN, self.cur_char, pos_start=self.pos.copy()))
-                self.advance()
+    def _merge(self, base, chunk, future):
+        # Yields the tokens a worker lexed from `chunk`, or its Error, and
+        # returns whether it was an Error.
+        columns = future.result()
+        if columns is None:
+            yield self._lex_at(base, chunk)
+            return True
+        # A name is one string object per chunk here, not per code.
+        yield from map(Token, *columns)
+        return False
 
-            elif self.cur_char == ")":
-                tokens.append(Token(TOK_RPAREN, self.cur_char, pos_start=self.pos.copy()))
-                self.advance()
+    def feed(self, chunk):
+        """Lexes the next `chunk` of a streamed source, returns its tokens or an Error.
 
-            elif self.cur_char == ",":
-                tokens.append(Token(TOK_COMMA, self.cur_char, pos_start=self.pos.copy()))
-                self.advance()
-            
-            elif self.cur_char == "\n":
-                tokens.append(Token(TOK_NEWLINE, self.cur_char, pos_start=self.pos.copy()))
-                self.advance()
+        Offsets carry on from the chunks fed before. No EOF is added.
+        """
+        self.source.feed(chunk)
+        self.base = self.source.base
+        return self._lex_chunk(chunk)
+
+    def _lex_chunk(self, code):
+        self.code = code
+        tokens = []
+        append = tokens.append
+        match = TOKEN_RE.match
+        base = self.base
+        idx = 0
+        end = len(code)
+
+        while idx < end:
+            m = match(code, idx)
+            if m is None:
+                return self._error_at(idx)
+
+            kind = m.lastgroup
+            start, idx = m.span()
+
+            if kind == "SPACE":
+                continue
+
+            elif kind == "NUM":
+                token = self._parse_num(m.group(), base + start)
+                if isinstance(token, Error):
+                    return token
+                append(token)
+
+            elif kind == "WORD":
+                append(self._parse_letters(m.group(), base + start))
+
+            elif kind == "STRING":
+                append(self._parse_string(m.group(), base + start))
+
+            elif kind == "SYMBOL":
+                tok_type, symbol = SYMBOLS[m.group()]
+                append(Token(tok_type, symbol, base + start, base + idx))
 
             else:
-                return UnknownCharError(f"Unknown character '{self.cur_char}'", self.pos.copy())
+                append(Token(TOK_NEWLINE, "\n", base + start, base + idx))
 
-        tokens.append(Token(TOK_EOF, pos_start=self.pos.copy()))
         return tokens
 
-    def _parse_num(self):
-        pos_start = self.pos.copy()
-        num_str = ""
-        is_float = False
-        while self.cur_char is not None and self.cur_char in DIGITS + ".":
-            if self.cur_char == ".":
-                if is_float:
-                    return InvalidCharError("Invalid charecter '.'", self.pos.copy())
-                is_float = True
-            num_str += self.cur_char
-            self.advance()
+    def _lex_at(self, base, chunk):
+        # A lexer of its own keeps `self.code` whole, and shares the Source
+        # so that errors point into it.
+        lexer = Lexer(chunk, self.file_name)
+        lexer.source = self.source
+        lexer.base = base
+        return lexer._lex_chunk(chunk)
+
+    def _error_at(self, idx):
+        char = self.code[idx]
+        if char == "\"":
+            # Strings stop at the end of the line, closed or not.
+            stop = self.code.find("\n", idx)
+            if stop == -1:
+                stop = len(self.code)
+            error = InvalidSyntaxError("Expected closing '\"'", self.base + idx, self.base + stop)
+        else:
+            error = UnknownCharError(f"Unknown character '{char}'", self.base + idx)
+        return error.set_source(self.source)
+
+    def _parse_num(self, num_str, start):
+        if num_str.count(".") > 1:
+            second_dot = num_str.index(".", num_str.index(".") + 1)
+            return InvalidCharError("Invalid charecter '.'", start + second_dot).set_source(self.source)
         if "." in num_str:
-            return Token(TOK_FLOAT, float(num_str), pos_start=pos_start, pos_end=self.pos.copy())
+            return Token(TOK_FLOAT, float(num_str), start, start + len(num_str))
         else:
-            return Token(TOK_INT, int(num_str), pos_start=pos_start, pos_end=self.pos.copy())
-    
-    def _parse_letters(self):
-        pos_start = self.pos.copy()
-        word = ""
-        while self.cur_char is not None and self.cur_char in LETTERS:
-            word += self.cur_char
-            self.advance()
+            return Token(TOK_INT, int(num_str), start, start + len(num_str))
+
+    def _parse_letters(self, word, start):
+        # Interned so every use of a name shares one string (and hashes once).
+        word = intern(word)
         if word in KEYWORDS:
-            return Token(TOK_KEYWORD, word, pos_start=pos_start, pos_end=self.pos.copy())
+            return Token(TOK_KEYWORD, word, start, start + len(word))
         else:
-            return Token(TOK_IDENTIFIER, word, pos_start=pos_start, pos_end=self.pos.copy())
-
-    def _parse_string(self):
-        pos_start = self.pos.copy()
-        parsed_string = ""
-        self.advance()
-        while self.cur_char != "\n" and self.cur_char is not None:
-            if self.cur_char == "\"":
-                self.advance()
-                return Token(TOK_STRING, parsed_string, pos_start, self.pos.copy())
-            elif self.cur_char == "\\":
-                self.advance()
-                if self.cur_char == "\\":
-                    self.advance()
-                    parsed_string += "\\"
-                elif self.cur_char == "t":
-                    self.advance()
-                    parsed_string += "\t"
-                elif self.cur_char == "n":
-                    self.advance()
-                    parsed_string += "\n"
-                elif self.cur_char == "r":
-                    self.advance()
-                    parsed_string += "\r"
-                elif self.cur_char == "v":
-                    self.advance()
-                    parsed_string += "\v"
-                elif self.cur_char == "f":
-                    self.advance()
-                    parsed_string += "\f"
-            else:
-                parsed_string += self.cur_char
-                self.advance()
-        return InvalidSyntaxError("Expected closing '\"'", pos_start, self.pos.copy())
-
-# Fix ending string
-# (.venv) PS E:\Nayan_Folder\PythonProjects\peng_compiler> python peng.py code.peng
-# Traceback (most recent call last):
-#   File "E:\Nayan_Folder\PythonProjects\peng_compiler\peng.py", line 72, in <module>
-#     compile_and_run(source, args.file)
-#   File "E:\Nayan_Folder\PythonProjects\peng_compiler\peng.py", line 16, in compile_and_run
-#     ast = parser.parse()
-#   File "E:\Nayan_Folder\PythonProjects\peng_compiler\core\parser.py", line 119, in parse
-#     expression = self.expression()
-#   File "E:\Nayan_Folder\PythonProjects\peng_compiler\core\parser.py", line 146, in expression
-#     statement = res.register(self.statement())
-#   File "E:\Nayan_Folder\PythonProjects\peng_compiler\core\parser.py", line 201, in statement
-#     node = res.register(self.math_op1())
-#   File "E:\Nayan_Folder\PythonProjects\peng_compiler\core\parser.py", line 208, in math_op1
-#     left = res.register(self.math_op2())
-#   File "E:\Nayan_Folder\PythonProjects\peng_compiler\core\parser.py", line 227, in math_op2
-#     left = res.register(self.factor())
-#   File "E:\Nayan_Folder\PythonProjects\peng_compiler\core\parser.py", line 248, in factor
-#     if self.cur_tok.type in (TOK_MINUS, TOK_PLUS):
-# AttributeError: 'InvalidSyntaxError' object has no attribute 'type'
+            return Token(TOK_IDENTIFIER, word, start, start + len(word))
+
+    def _parse_string(self, lexeme, start):
+        parsed_string = lexeme[1:-1]
+        if "\\" in parsed_string:
+            # A backslash before an unknown character is dropped, the character kept.
+            parsed_string = ESCAPE_RE.sub(lambda m: ESCAPES[m.group(1)], parsed_string)
+        # A literal repeated through the script is one string object.
+        return Token(TOK_STRING, intern(parsed_string), start, start + len(lexeme))
@@ -0,0 +1,211 @@
+from .errors import Error
+from .interpreter import Number, String
+from .parser import BinOpNode, NumberNode, StringNode, UnaryOpNode, postorder
+from .tokens import Token, TOK_DIV, TOK_FLOAT, TOK_INT, TOK_MINUS, TOK_MUL, TOK_PLUS, TOK_STRING
+
+# Longest string a fold may create. Anything bigger is built at run time, as
+# it would have been without the optimizer.
+MAX_FOLDED_STR = 4096
+
+BINARY_METHODS = {
+    TOK_PLUS: "add",
+    TOK_MINUS: "sub",
+    TOK_MUL: "mul",
+    TOK_DIV: "div",
+}
+
+# Static kinds of an expression's value. NUM is "int or float, unknown which",
+# None means nothing is known (a variable, or a mix that may not be valid).
+INT = "int"
+FLOAT = "float"
+NUM = "num"
+STR = "str"
+NUMERIC = (INT, FLOAT, NUM)
+
+
+def numeric_kind(left, right):
+    if left == INT and right == INT:
+        return INT
+    if FLOAT in (left, right) and left in NUMERIC and right in NUMERIC:
+        return FLOAT
+    return NUM
+
+
+def is_int(node, value):
+    return isinstance(node, NumberNode) and type(node.num) is int and node.num == value
+
+
+def with_span(node, pos_start, pos_end):
+    # The replacement takes over the folded node's span, so later errors
+    # point at the same source as before.
+    copy = object.__new__(type(node))
+    copy.__dict__.update(node.__dict__)
+    copy.pos_start = pos_start
+    copy.pos_end = pos_end
+    return copy
+
+
+class Optimizer:
+    """Rewrites parser nodes between `Parser.parse()` and the engine.
+
+    Level 1 folds constant subexpressions with the runtime's own Number/String
+    methods, level 2 also drops identities (`x * 1`, `x + 0`, `x - 0`, `x / 1`)
+    where the operand kinds make them exact. Anything that would raise an Error
+    is left in place, so runtime errors are unchanged.
+    """
+
+    def __init__(self, level=1):
+        self.level = level
+        self.folded = 0
+        self.simplified = 0
+
+    def optimize(self, node):
+        if self.level > 0:
+            node = self.visit(node)[0]
+        return node
+
+    def stats(self):
+        return f"opt-level {self.level}: folded {self.folded} nodes, simplified {self.simplified} identities"
+
+    def visit(self, node):
+        def visit_error(): raise RuntimeError(f"Optimize Method Not Available for node {type(node).__name__}")
+        func = getattr(self, f"visit_{type(node).__name__}", visit_error)
+        return func(node)
+
+    # Expression visitors return (node, kind).
+
+    def visit_NumberNode(self, node):
+        return node, INT if type(node.num) is int else FLOAT
+
+    def visit_StringNode(self, node):
+        return node, STR
+
+    def visit_VarGetNode(self, node):
+        return node, None
+
+    def visit_BinOpNode(self, node):
+        # Operands leave their (node, kind) on `results` for their operator.
+        results = []
+        for node in postorder(node):
+            node_type = type(node)
+            if node_type is BinOpNode:
+                node.right, right_kind = results.pop()
+                node.left, left_kind = results.pop()
+                results.append(self.binary(node, left_kind, right_kind))
+            elif node_type is UnaryOpNode:
+                node.node, kind = results.pop()
+                results.append(self.unary(node, kind))
+            else:
+                results.append(self.visit(node))
+        return results[0]
+
+    visit_UnaryOpNode = visit_BinOpNode
+
+    def binary(self, node, left_kind, right_kind):
+        """Folds or simplifies `node`, its operands already optimized."""
+        op = node.op.type
+
+        folded = self.fold_binary(node)
+        if folded is not None:
+            return folded
+
+        if self.level >= 2:
+            simplified = self.simplify(node, left_kind, right_kind)
+            if simplified is not None:
+                self.simplified += 1
+                return simplified
+
+        if op in (TOK_MINUS, TOK_DIV):
+            kind = FLOAT if op == TOK_DIV else numeric_kind(left_kind, right_kind)
+        elif left_kind in NUMERIC and right_kind in NUMERIC:
+            kind = numeric_kind(left_kind, right_kind)
+        elif op == TOK_PLUS and left_kind == STR and right_kind == STR:
+            kind = STR
+        elif op == TOK_MUL and STR in (left_kind, right_kind) and INT in (left_kind, right_kind):
+            kind = STR
+        else:
+            kind = None
+        return node, kind
+
+    def unary(self, node, kind):
+        """Folds or simplifies `node`, its operand already optimized."""
+        if node.op.type != TOK_MINUS:
+            # Unary plus hands its operand back untouched, whatever the type.
+            if isinstance(node.node, (NumberNode, StringNode)):
+                self.folded += 1
+            elif self.level >= 2:
+                self.simplified += 1
+            else:
+                return node, kind
+            return with_span(node.node, node.pos_start, node.pos_end), kind
+
+        if isinstance(node.node, NumberNode):
+            self.folded += 1
+            return self.constant(Number(node.node.num).neg(node.node.pos_start, node.node.pos_end), node)
+        return node, kind if kind in NUMERIC else NUM
+
+    def visit_VarAsgnNode(self, node):
+        node.node = self.visit(node.node)[0]
+        return node, None
+
+    def visit_PrintNode(self, node):
+        node.nodes = [self.visit(value)[0] for value in node.nodes]
+        return node, None
+
+    def visit_ExpressionNode(self, node):
+        node.statements = [self.visit(statement)[0] for statement in node.statements]
+        return node, None
+
+    def fold_binary(self, node):
+        left, right = node.left, node.right
+        if not isinstance(left, (NumberNode, StringNode)) or not isinstance(right, (NumberNode, StringNode)):
+            return None
+
+        left_value = Number(left.num) if isinstance(left, NumberNode) else String(left.str_val)
+        right_value = Number(right.num) if isinstance(right, NumberNode) else String(right.str_val)
+
+        # Check the size of a string result before building it, not after.
+        strings = [value for value in (left_value, right_value) if isinstance(value, String)]
+        if node.op.type == TOK_MUL and len(strings) == 1:
+            count = right_value if strings[0] is left_value else left_value
+            if isinstance(count.value, int) and len(strings[0].value) * count.value > MAX_FOLDED_STR:
+                return None
+        elif node.op.type == TOK_PLUS and len(strings) == 2:
+            if len(left_value.value) + len(right_value.value) > MAX_FOLDED_STR:
+                return None
+
+        try:
+            result = getattr(left_value, BINARY_METHODS[node.op.type])(right_value, left.pos_start, right.pos_end)
+        except Error:
+            return None
+        self.folded += 1
+        return self.constant(result, node)
+
+    def simplify(self, node, left_kind, right_kind):
+        op = node.op.type
+        left, right = node.left, node.right
+
+        # Repeating a string once or multiplying by int 1 changes nothing.
+        if op == TOK_MUL and is_int(right, 1):
+            return with_span(left, node.pos_start, node.pos_end), left_kind
+        if op == TOK_MUL and is_int(left, 1):
+            return with_span(right, node.pos_start, node.pos_end), right_kind
+        # Only ints: -0.0 + 0 is 0.0, and strings can't take a number.
+        if op == TOK_PLUS and is_int(right, 0) and left_kind == INT:
+            return with_span(left, node.pos_start, node.pos_end), left_kind
+        if op == TOK_PLUS and is_int(left, 0) and right_kind == INT:
+            return with_span(right, node.pos_start, node.pos_end), right_kind
+        if op == TOK_MINUS and is_int(right, 0) and left_kind in NUMERIC:
+            return with_span(left, node.pos_start, node.pos_end), left_kind
+        # Division always makes a float, so only a float can stay as is.
+        if op == TOK_DIV and is_int(right, 1) and left_kind == FLOAT:
+            return with_span(left, node.pos_start, node.pos_end), left_kind
+        return None
+
+    def constant(self, value, node):
+        if isinstance(value, String):
+            token = Token(TOK_STRING, value.value, node.pos_start, node.pos_end)
+            return StringNode(token), STR
+        if type(value.value) is int:
+            return NumberNode(Token(TOK_INT, value.value, node.pos_start, node.pos_end)), INT
+        return NumberNode(Token(TOK_FLOAT, value.value, node.pos_start, node.pos_end)), FLOAT
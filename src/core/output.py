@@ -0,0 +1,88 @@
+import os
+
+DEFAULT_BUFFER_SIZE = 1 << 16
+
+
+class Sink:
+    """Where the output of `say` goes.
+
+    Engines hand every piece of output to `write`. It is collected in memory
+    and written out in one go once `buffer_size` characters are pending, so
+    a script printing a million lines makes a few hundred writes instead of
+    millions. `buffer_size` 0 writes each line as soon as it ends (for
+    interactive use) and None keeps everything until `flush` or `close`.
+    """
+
+    def __init__(self, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self.parts = []
+        self.pending = 0
+        self.limit = float("inf") if buffer_size is None else buffer_size
+
+    def write(self, text):
+        self.parts.append(text)
+        self.pending += len(text)
+        if self.pending >= self.limit and (self.limit or text[-1:] == "\n"):
+            self.flush()
+
+    def say(self, *values):
+        """Writes `values` as one `say` line, for callers holding raw Python values."""
+        self.write(" ".join(map(str, values)) + "\n")
+
+    def flush(self):
+        if self.parts:
+            text = "".join(self.parts)
+            self.parts = []
+            self.pending = 0
+            self.write_out(text)
+
+    def close(self):
+        self.flush()
+
+    def write_out(self, text):
+        raise NotImplementedError
+
+
+class StreamSink(Sink):
+    """Writes to a text file object such as `sys.stdout`, which is left open."""
+
+    def __init__(self, stream, buffer_size=DEFAULT_BUFFER_SIZE):
+        super().__init__(buffer_size)
+        self.stream = stream
+
+    def write_out(self, text):
+        self.stream.write(text)
+        self.stream.flush()
+
+
+class FdSink(Sink):
+    """Writes UTF-8 straight to a file descriptor, past Python's io layers."""
+
+    def __init__(self, fd, buffer_size=DEFAULT_BUFFER_SIZE, close_fd=False):
+        super().__init__(buffer_size)
+        self.fd = fd
+        self.close_fd = close_fd
+
+    def write_out(self, text):
+        data = memoryview(text.encode("utf-8"))
+        while data:
+            data = data[os.write(self.fd, data):]
+
+    def close(self):
+        self.flush()
+        if self.close_fd:
+            os.close(self.fd)
+            self.close_fd = False
+
+
+class CaptureSink(Sink):
+    """Keeps all output in memory, for embedding PENG: see `getvalue`."""
+
+    def __init__(self):
+        super().__init__(None)
+
+    def flush(self):
+        pass
+
+    def getvalue(self):
+        return "".join(self.parts)
@@ -6,6 +6,8 @@ class NumberNode:
     def __init__(self, token):
         self.tok = token
         self.num = token.value
+        # The runtime Number, cached by the Interpreter.
+        self.value = None
 
         self.pos_start = token.pos_start
         self.pos_end = token.pos_end
@@ -17,6 +19,8 @@ class StringNode:
     def __init__(self, token):
         self.tok = token
         self.str_val = token.value
+        # The runtime String, cached by the Interpreter.
+        self.value = None
 
         self.pos_start = token.pos_start
         self.pos_end = token.pos_end
@@ -52,6 +56,10 @@ class VarAsgnNode:
         self.name_token = name_token
         self.name = name_token.value
         self.node = node
+        # Index into the Context's frame, set by the Resolver.
+        self.slot = None
+        # Nodes in the statement, counted by an Interpreter with a budget.
+        self.size = None
 
         self.pos_start = name_token.pos_start
         self.pos_end = node.pos_end
@@ -63,6 +71,8 @@ class VarGetNode:
     def __init__(self, name_token):
         self.name_token = name_token
         self.name = name_token.value
+        # Index into the Context's frame, set by the Resolver.
+        self.slot = None
 
         self.pos_start = name_token.pos_start
         self.pos_end = name_token.pos_end
@@ -73,24 +83,73 @@ class VarGetNode:
 class PrintNode:
     def __init__(self, nodes):
         self.nodes = nodes
+        # Nodes in the statement, counted by an Interpreter with a budget.
+        self.size = None
 
         self.pos_start = nodes[0].pos_start
         self.pos_end = nodes[-1].pos_end
 
     def __repr__(self):
-        return f"(say {self.node})"
+        return f"(say {self.nodes})"
 
 class ExpressionNode:
     def __init__(self, statements):
         self.statements = statements
 
-        self.pos_start = statements[0].pos_start
-        self.pos_end = statements[-1].pos_end
+        self.pos_start = statements[0].pos_start if statements else None
+        self.pos_end = statements[-1].pos_end if statements else None
 
     def __repr__(self):
         return f"ExpressionNode{self.statements}"
 
 
+# Nodes with children, as `postorder` walks them.
+PARENT_NODES = (BinOpNode, UnaryOpNode, VarAsgnNode, PrintNode, ExpressionNode)
+# On the `postorder` stack, above a node whose children were all yielded,
+# or above a node and its last child, which has no children itself.
+CHILDREN_DONE = object()
+LEAF_THEN_PARENT = object()
+
+
+def postorder(node):
+    """Yields the nodes of the tree under `node`, each after its children, left to right.
+
+    The walk keeps its own stack instead of recursing, so visitors built
+    on it take operators however deep the parser nested them.
+    """
+    stack = [node]
+    pop = stack.pop
+    while stack:
+        node = pop()
+        if node is LEAF_THEN_PARENT:
+            yield pop()
+            yield pop()
+            continue
+        if node is CHILDREN_DONE:
+            yield pop()
+            continue
+        node_type = type(node)
+        # Chains are left-deep: straight down to the leftmost operand.
+        while node_type is BinOpNode:
+            right = node.right
+            if type(right) in PARENT_NODES:
+                stack += (node, CHILDREN_DONE, right)
+            else:
+                stack += (node, right, LEAF_THEN_PARENT)
+            node = node.left
+            node_type = type(node)
+        if node_type is UnaryOpNode or node_type is VarAsgnNode:
+            stack += (node, CHILDREN_DONE, node.node)
+        elif node_type is PrintNode:
+            stack += (node, CHILDREN_DONE)
+            stack += reversed(node.nodes)
+        elif node_type is ExpressionNode:
+            stack += (node, CHILDREN_DONE)
+            stack += reversed(node.statements)
+        else:
+            yield node
+
+
 class ParseResult:
     def __init__(self):
         self.error = None
@@ -118,199 +177,194 @@ class ParseResult:
 
 class Parser:
      
-    def __init__(self, tokens) -> None:
-        self.tokens = tokens
-        self.idx = 0
-        self.cur_tok = self.tokens[self.idx]
+    def __init__(self, tokens, source=None) -> None:
+        self.tokens = iter(tokens)
+        self.source = source
+        self.lex_error = None
+        self.cur_tok = None
+        self.advance()
 
     def advance(self):
-        self.idx += 1
-        if self.idx < len(self.tokens):
-            self.cur_tok = self.tokens[self.idx]
+        tok = next(self.tokens, None)
+        if isinstance(tok, Error):
+            # Streamed tokens can end in a lexing error, it is reported in
+            # place of the statement that would have started here.
+            self.lex_error = tok
+            tok = Token(TOK_EOF, pos_start=tok.pos_start)
+        if tok is not None:
+            self.cur_tok = tok
         return self.cur_tok
 
     def parse(self):
-        # return self.tokens
-        expression = self.expression()
-        if expression.error:
-            return expression.error
-        return expression.node
-
+        statements = []
+        for statement in self.iter_parse():
+            if isinstance(statement, Error):
+                return statement
+            statements.append(statement)
+        return ExpressionNode(statements)
+
+    def iter_parse(self):
+        """Yields top-level statements one at a time, or an Error and stops."""
+        while True:
+            expression = self.expression()
+            if expression.error:
+                yield expression.error.set_source(self.source)
+                return
+            if expression.node is None:
+                return
+            yield expression.node
 
     def expression(self):
         res = ParseResult()
-        expressions = []
 
-        while True:
-            if self.cur_tok.type == TOK_NEWLINE:
-                res.register_advancement()
-                self.advance()
-                continue
+        while self.cur_tok.type == TOK_NEWLINE:
+            res.register_advancement()
+            self.advance()
+
+        if self.lex_error:
+            return res.failure(self.lex_error)
 
-            elif self.cur_tok.match(TOK_KEYWORD, "say"):
-                print_values = []
+        # The trailing NEWLINE is left for the next call, so a statement read
+        # from a stream runs without waiting for the line after it.
+        if self.cur_tok.match(TOK_KEYWORD, "say"):
+            print_values = []
+            res.register_advancement()
+            self.advance()
+            statement = res.register(self.statement())
+            if res.error: return res
+            print_values.append(statement)
+
+            while self.cur_tok.type == TOK_COMMA:
                 res.register_advancement()
                 self.advance()
                 statement = res.register(self.statement())
                 if res.error: return res
                 print_values.append(statement)
 
-                while self.cur_tok.type == TOK_COMMA:
-                    res.register_advancement()
-                    self.advance()
-                    statement = res.register(self.statement())
-                    if res.error: return res
-                    print_values.append(statement)
-                
-                if self.cur_tok.type == TOK_NEWLINE:
-                    res.register_advancement()
-                    self.advance()
-                    expressions.append(PrintNode(print_values))
-                elif self.cur_tok.type == TOK_EOF:
-                    expressions.append(PrintNode(print_values))
-                    return res.success(ExpressionNode(expressions))
-                else:
-                    return res.failure(InvalidSyntaxError(
-                        "Expected ',', '-', '+', '*' or '/'",
-                        self.cur_tok.pos_start, self.cur_tok.pos_end
-                    ))
-            elif self.cur_tok.type == TOK_IDENTIFIER:
-                name = self.cur_tok
-                value = None
-                res.register_advancement()
-                self.advance()
-
-                if self.cur_tok.match(TOK_KEYWORD, "is"):
-                    res.register_advancement()
-                    self.advance()
-                    value = res.register(self.statement())
-                    if res.error: return res
-                else:
-                    return res.failure(InvalidSyntaxError(
-                        "Expected 'is' after identifier",
-                        self.cur_tok.pos_start, self.cur_tok.pos_end
-                    ))
-                
-                if self.cur_tok.type == TOK_NEWLINE:
-                    res.register_advancement()
-                    self.advance()
-                    expressions.append(VarAsgnNode(name, value))
-                elif self.cur_tok.type == TOK_EOF:
-                    expressions.append(VarAsgnNode(name, value))
-                    return res.success(ExpressionNode(expressions))
-                else:
-                    return res.failure(InvalidSyntaxError(
-                        f"Expected ',' or '-', '+', '*' or '/' before '{self.cur_tok.value}'",
-                        self.cur_tok.pos_start, self.cur_tok.pos_end
-                    ))
-            elif self.cur_tok.type == TOK_EOF:
-                return res.success(ExpressionNode(expressions))
+            if self.cur_tok.type in (TOK_NEWLINE, TOK_EOF):
+                return res.success(PrintNode(print_values))
             else:
                 return res.failure(InvalidSyntaxError(
-                    f"Expected 'say', variable assignment or newline not '{self.cur_tok.value}'",
+                    "Expected ',', '-', '+', '*' or '/'",
                     self.cur_tok.pos_start, self.cur_tok.pos_end
                 ))
-
-    def statement(self):
-        res = ParseResult()
-        node = res.register(self.math_op1())
-        if res.error: return res
-        return res.success(node)
-
-    def math_op1(self):
-        res = ParseResult()
-
-        left = res.register(self.math_op2())
-        if res.error: return res
-
-        while self.cur_tok.type in (TOK_PLUS, TOK_MINUS):
-            op_tok = self.cur_tok
-            res.register_advancement()
-            self.advance()
-
-            right = res.register(self.math_op2())
-            if res.error: return res
-
-            left = BinOpNode(left, op_tok, right)
-
-        return res.success(left)
-
-
-    def math_op2(self):
-        res = ParseResult()
-
-        left = res.register(self.factor())
-        if res.error: return res
-
-
-
-        while self.cur_tok.type in (TOK_MUL, TOK_DIV):
-            op_tok = self.cur_tok
-            res.register_advancement()
-            self.advance()
-
-            right = res.register(self.factor())
-            if res.error: return res
-
-            left = BinOpNode(left, op_tok, right)
-
-        return res.success(left)
-
-
-    def factor(self):
-        res = ParseResult()
-
-        if self.cur_tok.type in (TOK_MINUS, TOK_PLUS):
-            res.register_advancement()
-            self.advance()
-
-            atom = res.register(self.atom())
-            if res.error: return res
-
-            return res.success(UnaryOpNode(self.cur_tok, atom))
-
-        else:
-            atom = res.register(self.atom())
-            if res.error: return res
-            return res.success(atom)
-
-    def atom(self):
-        res = ParseResult()
-
-        if self.cur_tok.type == TOK_LPAREN:
+        elif self.cur_tok.type == TOK_IDENTIFIER:
+            name = self.cur_tok
+            value = None
             res.register_advancement()
             self.advance()
 
-            expr = res.register(self.math_op1())
-            if res.error: return res
-
-            if self.cur_tok.type == TOK_RPAREN:
+            if self.cur_tok.match(TOK_KEYWORD, "is"):
                 res.register_advancement()
                 self.advance()
-                return res.success(expr)
+                value = res.register(self.statement())
+                if res.error: return res
             else:
                 return res.failure(InvalidSyntaxError(
-                    "Expected ')'",
+                    "Expected 'is' after identifier",
                     self.cur_tok.pos_start, self.cur_tok.pos_end
                 ))
-        elif self.cur_tok.type in (TOK_INT, TOK_FLOAT):
-            tok = self.cur_tok
-            res.register_advancement()
-            self.advance()
-            return res.success(NumberNode(tok))
-        elif self.cur_tok.type == TOK_IDENTIFIER:
-            tok = self.cur_tok
-            res.register_advancement()
-            self.advance()
-            return res.success(VarGetNode(tok))
-        elif self.cur_tok.type == TOK_STRING:
-            tok = self.cur_tok
-            res.register_advancement()
-            self.advance()
-            return res.success(StringNode(tok))
+
+            if self.cur_tok.type in (TOK_NEWLINE, TOK_EOF):
+                return res.success(VarAsgnNode(name, value))
+            else:
+                return res.failure(InvalidSyntaxError(
+                    f"Expected ',' or '-', '+', '*' or '/' before '{self.cur_tok.value}'",
+                    self.cur_tok.pos_start, self.cur_tok.pos_end
+                ))
+        elif self.cur_tok.type == TOK_EOF:
+            return res.success(None)
         else:
             return res.failure(InvalidSyntaxError(
-                f"Expected int, float, identifier or '('",
+                f"Expected 'say', variable assignment or newline not '{self.cur_tok.value}'",
                 self.cur_tok.pos_start, self.cur_tok.pos_end
             ))
-            
+
+    def statement(self):
+        """Parses an expression with operator precedence, without recursion.
+
+        Operands and operators wait on explicit stacks: an operator first
+        combines the operators before it that bind at least as tightly (all
+        are left associative, see BINARY_PRECEDENCE), and a '(' waits there
+        too, until its ')' closes the group. Nesting is so only limited by
+        memory, and the trees are those of the grammar
+
+            expr   : term (('+' | '-') term)*
+            term   : factor (('*' | '/') factor)*
+            factor : ('+' | '-')? atom
+            atom   : INT | FLOAT | IDENTIFIER | STRING | '(' expr ')'
+        """
+        res = ParseResult()
+        operands = []
+        # Operator tokens, and the '(' tokens of the open groups.
+        operators = []
+        # The sign before each open group, or None.
+        group_signs = []
+        advance = self.advance
+
+        while True:
+            # An operand: a sign, then an atom or the start of a group.
+            tok = self.cur_tok
+            sign = None
+            if tok.type == TOK_MINUS or tok.type == TOK_PLUS:
+                sign = tok
+                advance()
+                tok = self.cur_tok
+
+            tok_type = tok.type
+            if tok_type == TOK_LPAREN:
+                operators.append(tok)
+                group_signs.append(sign)
+                advance()
+                continue
+            elif tok_type == TOK_INT or tok_type == TOK_FLOAT:
+                node = NumberNode(tok)
+            elif tok_type == TOK_IDENTIFIER:
+                node = VarGetNode(tok)
+            elif tok_type == TOK_STRING:
+                node = StringNode(tok)
+            else:
+                return res.failure(InvalidSyntaxError(
+                    f"Expected int, float, identifier or '('",
+                    tok.pos_start, tok.pos_end
+                ))
+            advance()
+            operands.append(node if sign is None else UnaryOpNode(sign, node))
+
+            # Then operators: a binary one starts the next operand, ')' ends
+            # a group, anything else ends the expression.
+            while True:
+                tok = self.cur_tok
+                precedence = BINARY_PRECEDENCE.get(tok.type)
+                if precedence is not None:
+                    self.reduce(operands, operators, precedence)
+                    operators.append(tok)
+                    advance()
+                    break
+
+                if not group_signs:
+                    self.reduce(operands, operators, 0)
+                    return res.success(operands.pop())
+                if tok.type != TOK_RPAREN:
+                    return res.failure(InvalidSyntaxError(
+                        "Expected ')'",
+                        tok.pos_start, tok.pos_end
+                    ))
+                self.reduce(operands, operators, 0)
+                # The '('.
+                operators.pop()
+                sign = group_signs.pop()
+                if sign is not None:
+                    operands.append(UnaryOpNode(sign, operands.pop()))
+                advance()
+
+    @staticmethod
+    def reduce(operands, operators, precedence):
+        """Combines the operators on top of the stack binding at least as tightly as `precedence`."""
+        while operators:
+            precedence_before = BINARY_PRECEDENCE.get(operators[-1].type)
+            # None for the '(' of an open group.
+            if precedence_before is None or precedence_before < precedence:
+                return
+            right = operands.pop()
+            operands.append(BinOpNode(operands.pop(), operators.pop(), right))
@@ -1,4 +1,9 @@
+from bisect import bisect_right
+
+
 class Position():
+    __slots__ = ("idx", "col", "ln", "filename", "text")
+
     def __init__(self, idx, col, ln, filename, text):
         self.idx = idx
         self.col = col
@@ -9,13 +14,51 @@ class Position():
     def __repr__(self) -> str:
         return f"In {self.filename}, line {self.ln}, column {self.col}"
 
-    def advance(self, current_char=None):
-        self.idx += 1
-        self.col += 1
-        if current_char == "\n":
-            self.ln += 1
-            self.col = 1
-        return self
-    
-    def copy(self):
-        return Position(self.idx, self.col, self.ln, self.filename, self.text)
+
+class Source():
+    """Source text that turns plain integer offsets into a line and column.
+
+    Offsets are absolute from the start of the program. A streamed source only
+    keeps the chunk that was fed last (see `feed`), `base` and `first_ln` say
+    where that chunk starts. The line index is only built when an error is
+    formatted.
+    """
+    __slots__ = ("text", "filename", "base", "first_ln", "_line_starts")
+
+    def __init__(self, text, filename):
+        self.text = text
+        self.filename = filename
+        self.base = 0
+        self.first_ln = 1
+        self._line_starts = None
+
+    def feed(self, text):
+        self.first_ln += self.text.count("\n")
+        self.base += len(self.text)
+        self.text = text
+        self._line_starts = None
+
+    def line_starts(self):
+        if self._line_starts is None:
+            starts = [0]
+            find = self.text.find
+            idx = find("\n")
+            while idx != -1:
+                starts.append(idx + 1)
+                idx = find("\n", idx + 1)
+            self._line_starts = starts
+        return self._line_starts
+
+    def position(self, offset):
+        rel = offset - self.base
+        starts = self.line_starts()
+        line = max(bisect_right(starts, rel) - 1, 0)
+        return Position(offset, rel - starts[line] + 1, self.first_ln + line, self.filename, self.text)
+
+    def end_position(self, offset):
+        # Ends are exclusive: they sit one column after the last character,
+        # on that character's line, even when the character is a newline.
+        position = self.position(offset - 1)
+        position.idx += 1
+        position.col += 1
+        return position
@@ -0,0 +1,211 @@
+import json
+from time import perf_counter
+
+from .interpreter import Interpreter, OPERATOR_NODES
+from .parser import BinOpNode, PrintNode, UnaryOpNode, VarAsgnNode, postorder
+
+
+class Profiler:
+    """Where a run spent its time: per phase, per source line and per node type.
+
+    Phases (lex, parse, ...) are timed by whoever runs them, through `mark`.
+    Lines and node types are counted and timed by a ProfilingInterpreter.
+    None of it costs anything when not profiling: the plain engines have no
+    hooks to turn off, `peng.py --profile` picks the profiling one instead.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        # Line number -> [statements run, seconds, source text].
+        self.lines = {}
+        # Node class name -> [visits, cumulative seconds, own seconds, visits under way].
+        self.nodes = {}
+        self.last = perf_counter()
+
+    def mark(self, phase):
+        """Ends `phase`, which began at the previous mark or when the Profiler was made."""
+        now = perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.last
+        self.last = now
+
+    def add_lines(self, source, hits, times):
+        """Adds statement `hits` and own `times`, keyed by node offsets in `source`, to their lines.
+
+        Done before a streamed `source` moves on to its next chunk, while the
+        offsets can still be turned into lines.
+        """
+        lines = self.lines
+        for offset in hits.keys() | times.keys():
+            if offset is None:
+                continue
+            position = source.position(offset)
+            entry = lines.get(position.ln)
+            if entry is None:
+                start = offset - source.base - position.col + 1
+                end = source.text.find("\n", start)
+                entry = lines[position.ln] = [0, 0.0, source.text[start:end if end != -1 else None].strip()]
+            entry[0] += hits.get(offset, 0)
+            entry[1] += times.get(offset, 0.0)
+
+    def to_dict(self):
+        return {
+            "phases": self.phases,
+            "lines": [
+                {"line": ln, "count": count, "seconds": seconds, "text": text}
+                for ln, (count, seconds, text) in sorted(self.lines.items())
+            ],
+            "nodes": [
+                {"type": name, "count": count, "seconds": total, "own_seconds": own}
+                for name, (count, total, own, _) in sorted(self.nodes.items()) if count
+            ],
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def report(self, limit=20):
+        """The phases, then the `limit` lines and the node types that took longest, as text."""
+        out = ["phase                     time"]
+        for phase, seconds in self.phases.items():
+            out.append(f"  {phase:<18} {seconds * 1e3:>10.3f}ms")
+        out.append(f"  {'total':<18} {sum(self.phases.values()) * 1e3:>10.3f}ms")
+
+        if not self.nodes:
+            out.append("\n(lines and node types are only profiled on the tree engine)")
+            return "\n".join(out)
+
+        # Own times add up to the whole run, without counting a node twice.
+        run = sum(own for _, _, own, _ in self.nodes.values()) or 1.0
+        lines = sorted(self.lines.items(), key=lambda item: item[1][1], reverse=True)
+        out.append("\nline       runs        time      %  source"
+                   + (f" ({limit} of {len(lines)} lines)" if len(lines) > limit else ""))
+        for ln, (count, seconds, text) in lines[:limit]:
+            out.append(f"{ln:>6} {count:>8} {seconds * 1e3:>10.3f}ms {seconds / run:>6.1%}  {text}")
+
+        out.append("\nnode type         visits  cumulative         own      %")
+        nodes = sorted(self.nodes.items(), key=lambda item: item[1][2], reverse=True)
+        for name, (count, total, own, _) in nodes:
+            if count:
+                out.append(f"  {name:<14} {count:>8} {total * 1e3:>10.3f}ms {own * 1e3:>10.3f}ms {own / run:>6.1%}")
+        return "\n".join(out)
+
+
+class ProfilingInterpreter(Interpreter):
+    """The tree walker, counting and timing every node it visits for a Profiler.
+
+    A node's own time leaves out the nodes it visits. It goes to the node's
+    type and to the line the node starts on; its cumulative time (nested
+    nodes of the same type counted once) goes to the type only. A line's
+    runs are the statements starting on it that were run.
+
+    Operators are all applied by `evaluate`, those nested in others too,
+    so it counts and times them rather than `dispatch`.
+    """
+
+    def __init__(self, source=None, output=None, profiler=None, budget=None):
+        super().__init__(source, output, budget=budget)
+        self.profiler = profiler if profiler is not None else Profiler()
+        # Statement runs and own seconds by node offset, until `interpret`
+        # hands them to the profiler.
+        self.hits = {}
+        self.times = {}
+        # Time spent in the nodes visited by the one being visited.
+        self.inner = 0.0
+        self.operator_stats = {}
+        for node_class, func in self.dispatch.items():
+            stats = self.profiler.nodes.setdefault(node_class.__name__, [0, 0.0, 0.0, 0])
+            if node_class in OPERATOR_NODES:
+                self.operator_stats[node_class] = stats
+                self.dispatch[node_class] = self.evaluate
+                continue
+            # The only statements there are.
+            statement = node_class in (VarAsgnNode, PrintNode)
+            self.dispatch[node_class] = self.timed(func, stats, statement)
+
+    def timed(self, func, stats, statement):
+        times = self.times
+        hits = self.hits
+
+        def visit(node, context):
+            if statement:
+                hits[node.pos_start] = hits.get(node.pos_start, 0) + 1
+            outer = self.inner
+            self.inner = 0.0
+            stats[3] += 1
+            start = perf_counter()
+            try:
+                return func(node, context)
+            finally:
+                elapsed = perf_counter() - start
+                own = elapsed - self.inner
+                self.inner = outer + elapsed
+                stats[0] += 1
+                stats[2] += own
+                stats[3] -= 1
+                if not stats[3]:
+                    stats[1] += elapsed
+                offset = node.pos_start
+                times[offset] = times.get(offset, 0.0) + own
+        return visit
+
+    def evaluate(self, node, context):
+        """Like `Interpreter.evaluate`, counting and timing every operator it applies.
+
+        An operator's time runs from the start of its left operand to its
+        own application; its own time leaves out its operands'.
+        """
+        dispatch = self.dispatch
+        times = self.times
+        binary_stats = self.operator_stats[BinOpNode]
+        unary_stats = self.operator_stats[UnaryOpNode]
+        outer = self.inner
+        entered = perf_counter()
+        # (value, start, elapsed, then the cumulative BinOpNode and
+        # UnaryOpNode time already counted within) per operand.
+        values = []
+        try:
+            for node in postorder(node):
+                node_type = type(node)
+                if node_type is BinOpNode:
+                    right, _, right_elapsed, right_binary, right_unary = values.pop()
+                    left, start, inner, binary, unary = values[-1]
+                    inner += right_elapsed
+                    binary += right_binary
+                    unary += right_unary
+                    stats = binary_stats
+                elif node_type is UnaryOpNode:
+                    operand, start, inner, binary, unary = values[-1]
+                    stats = unary_stats
+                else:
+                    # Timed by `dispatch` like any other node.
+                    start = perf_counter()
+                    value = dispatch[node_type](node, context)
+                    values.append((value, start, perf_counter() - start, 0.0, 0.0))
+                    continue
+                try:
+                    value = self.apply(node, left, right) if node_type is BinOpNode else self.unary(node, operand)
+                finally:
+                    elapsed = perf_counter() - start
+                    own = elapsed - inner
+                    stats[0] += 1
+                    stats[2] += own
+                    if node_type is BinOpNode:
+                        stats[1] += elapsed - binary
+                        binary = elapsed
+                    else:
+                        stats[1] += elapsed - unary
+                        unary = elapsed
+                    times[node.pos_start] = times.get(node.pos_start, 0.0) + own
+                values[-1] = (value, start, elapsed, binary, unary)
+            return values[0][0]
+        finally:
+            self.inner = outer + perf_counter() - entered
+
+    def interpret(self, ast, context):
+        try:
+            return super().interpret(ast, context)
+        finally:
+            if self.source is not None:
+                self.profiler.add_lines(self.source, self.hits, self.times)
+            self.hits.clear()
+            self.times.clear()
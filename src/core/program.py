@@ -0,0 +1,86 @@
+from .interpreter import Context, Interpreter, Number, String
+from .output import CaptureSink
+
+
+class Result:
+    """What one `Program.run` did.
+
+    `error` is the PENG Error that stopped it or None, `variables` maps the
+    names with a value at the end to Python ints, floats and strs, and
+    `output` is the text it said, when it ran without an `output` sink.
+    """
+
+    def __init__(self, error, variables, output=None):
+        self.error = error
+        self.variables = variables
+        self.output = output
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return f"Result(error={self.error!r}, variables={self.variables!r}, output={self.output!r})"
+
+
+class Program:
+    """A PENG program compiled once (see `peng.compile`), to be run any number of times.
+
+    A Program is never changed by running it: every `run` gets its own
+    engine, Context and frame and only reads the compiled code and the
+    symbol table. It can so be run from many threads at once. Names the
+    program reads before assigning them are its `inputs`, to be given
+    values through `bindings`.
+    """
+
+    def __init__(self, source, engine_class, compiled, symbol_table, inputs):
+        self.source = source
+        self.engine_class = engine_class
+        self.compiled = compiled
+        self.symbol_table = symbol_table
+        self.inputs = tuple(inputs)
+
+    def run(self, bindings=None, output=None, hooks=None, budget=None):
+        """Runs the program and returns its Result. Never prints or exits.
+
+        `bindings` maps variable names to the int, float or str values they
+        start with. Output goes to the `output` sink, which is flushed but
+        not closed, or else is returned as `Result.output`. `hooks` (see
+        core.hooks) are told what the run does and a `budget` (see
+        core.budget) limits it, on the tree engine only.
+        """
+        if (hooks is not None or budget is not None) and not issubclass(self.engine_class, Interpreter):
+            raise ValueError("hooks and budgets can only be used on the tree engine")
+        values = {}
+        for name, value in (bindings or {}).items():
+            if name not in self.symbol_table.slots:
+                raise ValueError(f"{name!r} is not a variable of this program")
+            values[name] = to_value(value)
+
+        captured = output is None
+        if captured:
+            output = CaptureSink()
+        context = Context("<main>")
+        context.symbol_table = self.symbol_table
+        context.grow_frame(len(self.symbol_table.slots))
+
+        if hooks is None and budget is None:
+            engine = self.engine_class(self.source, output)
+        else:
+            engine = self.engine_class(self.source, output, hooks, budget)
+        try:
+            res = engine.execute(self.compiled, context, values)
+        finally:
+            output.flush()
+        variables = {name: value.value for name, value in engine.read_variables(self.compiled, context).items()}
+        return Result(res.error, variables, output.getvalue() if captured else None)
+
+
+def to_value(value):
+    if isinstance(value, (Number, String)):
+        return value
+    if type(value) is str:
+        return String(value)
+    if type(value) in (int, float):
+        return Number(value)
+    raise TypeError(f"PENG has no values of type {type(value).__name__}")
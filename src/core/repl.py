@@ -0,0 +1,118 @@
+import sys
+from time import perf_counter
+
+from .errors import Error
+from .interpreter import Context, SymbolTable
+from .lexer import Lexer
+from .optimizer import Optimizer
+from .output import StreamSink
+from .parser import Parser
+from .resolver import Resolver
+from .tokens import Token, TOK_EOF
+
+HELP = """\
+Enter a PENG statement to run it, e.g. `x is 2` then `say x * 21`.
+  :time         report how long each input takes to lex, parse, compile and run
+  :time CODE    run CODE and report its times
+  help          this text
+  exit          leave (so does Ctrl-D)
+More at https://bluten.tk/project/peng/wiki"""
+
+
+class Repl:
+    """Runs PENG typed in one line at a time.
+
+    Every line runs on the same Context, so a variable assigned on one line
+    can be read on the next. Only the new line is lexed and parsed: the
+    source is streamed (see `Lexer.feed`), so it keeps its own line numbers
+    for errors and the cost of a line does not grow with the session. An
+    error is printed and the session goes on. Statements that ran before it
+    keep their effect, the failing statement has none.
+    """
+
+    def __init__(self, engine_class, opt_level=1, output=None, file_name="<stdin>"):
+        self.output = output if output is not None else StreamSink(sys.stdout, 0)
+        self.lexer = Lexer("", file_name)
+        self.context = Context("<main>")
+        self.context.symbol_table = SymbolTable()
+        self.resolver = Resolver(self.context, self.lexer.source)
+        self.optimizer = Optimizer(opt_level)
+        self.engine = engine_class(self.lexer.source, self.output)
+        self.timing = False
+
+    def run(self, banner=None, prompt=">>> "):
+        """Reads and runs lines from stdin until `exit` or end of input."""
+        try:
+            # Line editing and history, where Python has it.
+            import readline  # noqa: F401  # enables line editing in input()
+        except ImportError:
+            pass
+
+        if banner:
+            print(banner)
+        while True:
+            try:
+                line = input(prompt)
+            except EOFError:
+                print()
+                break
+            except KeyboardInterrupt:
+                print("\nKeyboardInterrupt")
+                continue
+
+            command = line.strip()
+            if command == "exit":
+                break
+            elif command == "help":
+                print(HELP)
+            elif command == ":time":
+                self.timing = not self.timing
+                print(f"timing {'on' if self.timing else 'off'}")
+            elif command.startswith(":time "):
+                self.run_line(command[len(":time "):], timing=True)
+            elif command:
+                self.run_line(line)
+
+    def run_line(self, line, timing=None):
+        """Runs one line of PENG, returns the Error it stopped at or None."""
+        try:
+            error = self.execute(line, self.timing if timing is None else timing)
+        except KeyboardInterrupt:
+            self.output.flush()
+            print("\nKeyboardInterrupt")
+            return None
+        if error:
+            print(error)
+        return error
+
+    def execute(self, line, timing=False):
+        start = perf_counter()
+        tokens = self.lexer.feed(line + "\n")
+        if isinstance(tokens, Error):
+            return tokens
+        source = self.lexer.source
+        tokens.append(Token(TOK_EOF, pos_start=source.base + len(source.text)))
+
+        lexed = perf_counter()
+        ast = Parser(tokens, source).parse()
+        if isinstance(ast, Error):
+            return ast
+
+        parsed = perf_counter()
+        ast = self.resolver.resolve(ast)
+        if isinstance(ast, Error):
+            return ast
+        ast = self.optimizer.optimize(ast)
+
+        compiled = perf_counter()
+        try:
+            res = self.engine.interpret(ast, self.context)
+        finally:
+            self.output.flush()
+        done = perf_counter()
+
+        if timing:
+            print(f"lex {(lexed - start) * 1e3:.3f}ms, parse {(parsed - lexed) * 1e3:.3f}ms, "
+                  f"compile {(compiled - parsed) * 1e3:.3f}ms, run {(done - compiled) * 1e3:.3f}ms",
+                  file=sys.stderr)
+        return res.error
@@ -0,0 +1,84 @@
+from .errors import Error, IdentifierError
+from .parser import VarGetNode, postorder
+
+
+class Resolver:
+    """Gives every variable a slot in its Context's frame.
+
+    Runs between the parser and the optimizer and sets `slot` on each
+    VarAsgnNode/VarGetNode. PENG has no branches, so a name read before any
+    assignment to it can never be defined: that read is reported here, before
+    anything runs. The slots live in the Context's SymbolTable, so statements
+    resolved one at a time (streaming) keep sharing them.
+
+    With `inputs`, such a read is not an error: the name gets a slot like an
+    assigned one and is added to `self.inputs`, for a value bound before the
+    program runs (see core.program).
+    """
+
+    def __init__(self, context, source=None, inputs=False):
+        self.context = context
+        self.symbol_table = context.symbol_table
+        self.source = source
+        self.inputs = [] if inputs else None
+        self.visitors = {}
+
+    def resolve(self, node):
+        """Returns `node` with its variables resolved, or the Error for the first undefined one."""
+        try:
+            self.visit(node)
+        except Error as error:
+            return error.set_source(self.source)
+        return node
+
+    def visit(self, node):
+        func = self.visitors.get(type(node))
+        if func is None:
+            func = getattr(self, f"visit_{type(node).__name__}", None)
+            if func is None:
+                raise RuntimeError(f"Resolve Method Not Available for node {type(node).__name__}")
+            self.visitors[type(node)] = func
+        func(node)
+
+    def visit_NumberNode(self, node):
+        pass
+
+    def visit_StringNode(self, node):
+        pass
+
+    def visit_BinOpNode(self, node):
+        # Only the names need resolving, in source order.
+        for node in postorder(node):
+            if type(node) is VarGetNode:
+                self.visit_VarGetNode(node)
+
+    visit_UnaryOpNode = visit_BinOpNode
+
+    def visit_VarAsgnNode(self, node):
+        # The value first: in `x is x + 1` the x read is not defined yet.
+        self.visit(node.node)
+        node.slot = self.symbol_table.define(node.name)
+        self.context.grow_frame(len(self.symbol_table.slots))
+
+    def visit_VarGetNode(self, node):
+        slot = self.symbol_table.get(node.name)
+        if slot is None and self.inputs is not None:
+            slot = self.symbol_table.define(node.name)
+            self.context.grow_frame(len(self.symbol_table.slots))
+            self.inputs.append(node.name)
+        elif slot is None:
+            raise IdentifierError(
+                f"Identifier {node.name} not defined!",
+                node.name_token.pos_start,
+                node.name_token.pos_end,
+                self.context
+            )
+        node.slot = slot
+
+    def visit_PrintNode(self, node):
+        for value in node.nodes:
+            self.visit(value)
+
+    def visit_ExpressionNode(self, node):
+        for statement in node.statements:
+            self.visit(statement)
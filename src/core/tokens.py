@@ -23,6 +23,15 @@ TOK_IDENTIFIER = "IDENTIFIER"
 TOK_NEWLINE = "NEWLINE"
 TOK_EOF = "EOF"
 
+# How tightly each binary operator binds, for the Parser. All of them are
+# left associative.
+BINARY_PRECEDENCE = {
+    TOK_PLUS: 1,
+    TOK_MINUS: 1,
+    TOK_MUL: 2,
+    TOK_DIV: 2,
+}
+
 KEYWORDS = [
     "say",
     "is"
@@ -30,16 +39,16 @@ KEYWORDS = [
 
 
 class Token:
-    
+    __slots__ = ("type", "value", "pos_start", "pos_end")
+
+    # Positions are source offsets, pos_end is exclusive.
     def __init__(self, type:str, value=None, pos_start=None, pos_end=None):
         self.type = type
         self.value = value
-        if pos_start is not None:
-            self.pos_start = pos_start.copy()
-            self.pos_end = pos_start.copy()
-            self.pos_end.advance()
-        if pos_end:
-            self.pos_end = pos_end.copy()
+        self.pos_start = pos_start
+        if pos_end is None and pos_start is not None:
+            pos_end = pos_start + 1
+        self.pos_end = pos_end
     
     def __repr__(self):
         return f"{self.type}" if self.value is None else f"{self.type}:{self.value}"
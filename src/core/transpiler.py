@@ -0,0 +1,272 @@
+import sys
+
+from .errors import Error
+from .interpreter import Context, Interpreter, Number, RTResult, String, UNSET
+from .output import StreamSink
+from .parser import BinOpNode, ExpressionNode, UnaryOpNode, VarAsgnNode, postorder
+from .tokens import TOK_DIV, TOK_MINUS, TOK_MUL, TOK_PLUS
+
+CODE_FILENAME = "<peng>"
+
+# (Python operator, precedence)
+BINARY_OPS = {
+    TOK_PLUS: ("+", 1),
+    TOK_MINUS: ("-", 1),
+    TOK_MUL: ("*", 2),
+    TOK_DIV: ("/", 2),
+}
+ATOM = 3
+
+# Python raises these exactly where PENG reports an error. For int, float and
+# str operands the valid cases of + - * / and unary - line up with PENG:
+# str * int repeats, / always gives a float.
+PENG_FAILURES = (TypeError, ZeroDivisionError, NameError)
+
+# What Python's compiler raises on an expression nested too deep for it.
+TOO_DEEP = (SyntaxError, RecursionError, MemoryError)
+
+
+def py_name(name):
+    # Prefixed so PENG names never clash with Python keywords or our helpers.
+    return f"v_{name}"
+
+
+def join(fragments):
+    """The text of a tree of str `fragments` in nested tuples, made in one go."""
+    out = []
+    stack = [fragments]
+    while stack:
+        item = stack.pop()
+        if type(item) is str:
+            out.append(item)
+        else:
+            stack.extend(reversed(item))
+    return "".join(out)
+
+
+def starts_with_minus(fragments):
+    while type(fragments) is not str:
+        fragments = fragments[0]
+    return fragments.startswith("-")
+
+
+def py_literal(value):
+    # A float literal too long to fit is inf, which has no Python literal.
+    if value != value or value in (float("inf"), float("-inf")):
+        return "1e999"
+    return repr(value)
+
+
+class Transpiler:
+    """Lowers parser nodes to a Python code object.
+
+    The nodes are turned into Python source, one line per PENG statement,
+    and handed to `compile()`. Building the equivalent `ast.Module` object by
+    object from Python costs several times more than running the result.
+    `statements[lineno - 1]` is the PENG statement behind a line, that is how
+    a Python exception is traced back to PENG.
+
+    A statement nested too deep for Python's compiler becomes a `_tree(i)`
+    line instead, which runs `statements[i]` on the tree walker.
+    """
+
+    def __init__(self):
+        self.visitors = {}
+
+    def transpile(self, node):
+        self.lines = []
+        self.statements = []
+        if type(node) is ExpressionNode:
+            for statement in node.statements:
+                self.visit_statement(statement)
+        else:
+            self.visit_statement(node)
+        try:
+            return compile("\n".join(self.lines), CODE_FILENAME, "exec"), self.statements
+        except TOO_DEEP:
+            pass
+        # Only now is each line compiled on its own, to find those at fault.
+        for i, line in enumerate(self.lines):
+            try:
+                compile(line, CODE_FILENAME, "exec")
+            except TOO_DEEP:
+                self.lines[i] = f"_tree({i})"
+        return compile("\n".join(self.lines), CODE_FILENAME, "exec"), self.statements
+
+    def visit_statement(self, node):
+        try:
+            self.visit(node)
+        except (RecursionError, MemoryError):
+            # The statement visitors add their line last, nothing was added.
+            self.statement(f"_tree({len(self.statements)})", node)
+
+    def statement(self, line, node):
+        self.lines.append(line)
+        self.statements.append(node)
+
+    def visit(self, node):
+        func = self.visitors.get(type(node))
+        if func is None:
+            func = getattr(self, f"visit_{type(node).__name__}", None)
+            if func is None:
+                raise RuntimeError(f"Transpile Method Not Available for node {type(node).__name__}")
+            self.visitors[type(node)] = func
+        return func(node)
+
+    # Expression visitors return (python source, precedence).
+
+    def visit_NumberNode(self, node):
+        return py_literal(node.num), ATOM
+
+    def visit_StringNode(self, node):
+        return repr(node.str_val), ATOM
+
+    def visit_BinOpNode(self, node):
+        # Operands leave their (fragments, precedence) on `results` for
+        # their operator. The text is joined once at the end, pasting it
+        # together level by level would copy it over and over.
+        results = []
+        for node in postorder(node):
+            node_type = type(node)
+            if node_type is BinOpNode:
+                op, prec = BINARY_OPS[node.op.type]
+                right, right_prec = results.pop()
+                left, left_prec = results.pop()
+                # Left associative: only a right operand of equal precedence
+                # keeps its parentheses, so long chains stay flat.
+                if left_prec < prec:
+                    left = ("(", left, ")")
+                if right_prec <= prec:
+                    right = ("(", right, ")")
+                results.append(((left, f" {op} ", right), prec))
+            elif node_type is UnaryOpNode:
+                if node.op.type == TOK_MINUS:
+                    operand, prec = results.pop()
+                    if prec < ATOM or starts_with_minus(operand):
+                        operand = ("(", operand, ")")
+                    results.append((("-", operand), ATOM))
+            else:
+                results.append(self.visit(node))
+        fragments, prec = results[0]
+        return join(fragments), prec
+
+    visit_UnaryOpNode = visit_BinOpNode
+
+    def visit_VarGetNode(self, node):
+        return py_name(node.name), ATOM
+
+    def visit_VarAsgnNode(self, node):
+        value, _ = self.visit(node.node)
+        self.statement(f"{py_name(node.name)} = {value}", node)
+
+    def visit_PrintNode(self, node):
+        # All values are evaluated before anything is printed, so a failing
+        # `say` has printed nothing yet when it is replayed.
+        values = ", ".join(self.visit(value)[0] for value in node.nodes)
+        self.statement(f"_print({values})", node)
+
+    def visit_ExpressionNode(self, node):
+        for statement in node.statements:
+            self.visit_statement(statement)
+
+
+class PythonEngine:
+    """Runs PENG programs as transpiled Python code.
+
+    Variables live in one namespace dict shared by every statement run on this
+    engine. When the generated code raises, the failing PENG statement is run
+    again by the tree walker against a copy of the current variables, which
+    yields the exact PENG output and error. The Python line raised before
+    assigning or printing anything, so nothing is done twice.
+    """
+
+    def __init__(self, source=None, output=None):
+        self.source = source
+        self.output = output if output is not None else StreamSink(sys.stdout, 0)
+        self.transpiler = Transpiler()
+        self.namespace = {"__builtins__": {}, "_print": self.output.say, "_tree": self.run_tree}
+        # Of the code being run, for `run_tree`.
+        self.statements = None
+        self.context = None
+
+    def interpret(self, tree, context):
+        res = RTResult()
+        try:
+            self.run(*self.transpiler.transpile(tree), context)
+        except Error as error:
+            return res.failure(error.set_source(self.source))
+        return res.success(None)
+
+    def compile(self, ast):
+        return self.transpiler.transpile(ast)
+
+    def execute(self, compiled, context, bindings):
+        for name, value in bindings.items():
+            self.namespace[py_name(name)] = value.value
+        res = RTResult()
+        try:
+            self.run(*compiled, context)
+        except Error as error:
+            return res.failure(error.set_source(self.source))
+        return res.success(None)
+
+    def read_variables(self, compiled, context):
+        values = {}
+        for name in context.symbol_table.slots:
+            value = self.namespace.get(py_name(name), UNSET)
+            if value is not UNSET:
+                values[name] = String(value) if type(value) is str else Number(value)
+        return values
+
+    def interpret_stream(self, statements, context):
+        res = RTResult()
+        for statement in statements:
+            if isinstance(statement, Error):
+                return res.failure(statement)
+            res = self.interpret(statement, context)
+            if res.error:
+                return res
+        return res
+
+    def run(self, code, statements, context):
+        self.statements = statements
+        self.context = context
+        try:
+            exec(code, self.namespace)
+        except PENG_FAILURES as exc:
+            # Raises the PENG Error, if the statement really is a PENG failure.
+            self._replay(exc, statements, context)
+            raise
+
+    def _replay(self, exc, statements, context):
+        tb = exc.__traceback__
+        lineno = None
+        while tb is not None:
+            if tb.tb_frame.f_code.co_filename == CODE_FILENAME:
+                lineno = tb.tb_lineno
+            tb = tb.tb_next
+        if lineno is None:
+            return
+
+        Interpreter(self.source, self.output).visit(statements[lineno - 1], self.tree_context(context))
+
+    def run_tree(self, index):
+        """Runs the statement of a `_tree(index)` line on the tree walker."""
+        statement = self.statements[index]
+        context = self.tree_context(self.context)
+        Interpreter(self.source, self.output).visit(statement, context)
+        if type(statement) is VarAsgnNode:
+            self.namespace[py_name(statement.name)] = context.frame[statement.slot].value
+
+    def tree_context(self, context):
+        # A copy of the variables for the tree walker. Statements were
+        # resolved against `context`, so their slots index a frame laid out
+        # like `context.frame`.
+        copy = Context(context.display_name)
+        copy.symbol_table = context.symbol_table
+        copy.grow_frame(len(context.symbol_table.slots))
+        for name, slot in context.symbol_table.slots.items():
+            value = self.namespace.get(py_name(name), UNSET)
+            if value is not UNSET:
+                copy.frame[slot] = String(value) if type(value) is str else Number(value)
+        return copy
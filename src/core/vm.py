@@ -0,0 +1,175 @@
+import sys
+
+from .compiler import (
+    Compiler, LOAD_CONST, LOAD_NAME, STORE_NAME, BINARY_ADD, BINARY_SUB,
+    BINARY_MUL, BINARY_DIV, UNARY_NEG, PRINT_ITEM, PRINT_LAST
+)
+from .errors import Error, IdentifierError
+from .interpreter import Number, RTResult, String, UNSET
+from .output import StreamSink
+
+
+SLOW_BINARY_OPS = {
+    BINARY_ADD: "add",
+    BINARY_SUB: "sub",
+    BINARY_MUL: "mul",
+    BINARY_DIV: "div",
+}
+
+
+def wrap(value):
+    return String(value) if type(value) is str else Number(value)
+
+
+class VM:
+    """Stack machine running Bytecode from `Compiler`.
+
+    Values on the stack are plain Python ints, floats and strs. Only when the
+    operand types are not the obvious case are they wrapped in Number/String
+    so the errors (and odd cases like string repetition) come from the exact
+    same code the tree walker uses.
+    """
+
+    def __init__(self, source=None, output=None):
+        self.source = source
+        self.output = output if output is not None else StreamSink(sys.stdout, 0)
+        self.compiler = Compiler()
+        self.variables = []
+
+    def interpret(self, ast, context):
+        res = RTResult()
+        try:
+            self.run(self.compiler.compile(ast), context)
+        except Error as error:
+            return res.failure(error.set_source(self.source))
+        return res.success(None)
+
+    def compile(self, ast):
+        return self.compiler.compile(ast)
+
+    def execute(self, bytecode, context, bindings):
+        names = {name: idx for idx, name in enumerate(bytecode.names)}
+        self.variables.extend([UNSET] * (len(bytecode.names) - len(self.variables)))
+        for name, value in bindings.items():
+            # A name the code never mentions can't be read either.
+            if name in names:
+                self.variables[names[name]] = value.value
+        res = RTResult()
+        try:
+            self.run(bytecode, context)
+        except Error as error:
+            return res.failure(error.set_source(self.source))
+        return res.success(None)
+
+    def read_variables(self, bytecode, context):
+        return {
+            name: wrap(value)
+            for name, value in zip(bytecode.names, self.variables) if value is not UNSET
+        }
+
+    def interpret_stream(self, statements, context):
+        res = RTResult()
+        for statement in statements:
+            if isinstance(statement, Error):
+                return res.failure(statement)
+            res = self.interpret(statement, context)
+            if res.error:
+                return res
+        return res
+
+    def run(self, bytecode, context):
+        code = bytecode.code
+        consts = bytecode.consts
+        variables = self.variables
+        if len(variables) < len(bytecode.names):
+            variables.extend([UNSET] * (len(bytecode.names) - len(variables)))
+
+        write = self.output.write
+        # Values of the `say` being run, written out as one line.
+        line = []
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        pc = 0
+        end = len(code)
+
+        try:
+            while pc < end:
+                op = code[pc]
+                arg = code[pc + 1]
+                pc += 2
+
+                if op == LOAD_CONST:
+                    push(consts[arg])
+
+                elif op == LOAD_NAME:
+                    value = variables[arg]
+                    if value is UNSET:
+                        pos_start, pos_end = bytecode.spans[(pc - 2) >> 1]
+                        raise IdentifierError(
+                            f"Identifier {bytecode.names[arg]} not defined!",
+                            pos_start, pos_end, context
+                        )
+                    push(value)
+
+                elif op == STORE_NAME:
+                    variables[arg] = pop()
+
+                elif op == BINARY_ADD:
+                    right = pop()
+                    left = stack[-1]
+                    if (type(left) is str) is (type(right) is str):
+                        stack[-1] = left + right
+                    else:
+                        stack[-1] = self._slow_binary(bytecode, pc, op, left, right)
+
+                elif op == BINARY_SUB:
+                    right = pop()
+                    left = stack[-1]
+                    if type(left) is not str and type(right) is not str:
+                        stack[-1] = left - right
+                    else:
+                        stack[-1] = self._slow_binary(bytecode, pc, op, left, right)
+
+                elif op == BINARY_MUL:
+                    right = pop()
+                    left = stack[-1]
+                    if type(left) is not str and type(right) is not str:
+                        stack[-1] = left * right
+                    else:
+                        stack[-1] = self._slow_binary(bytecode, pc, op, left, right)
+
+                elif op == BINARY_DIV:
+                    right = pop()
+                    left = stack[-1]
+                    if type(left) is not str and type(right) is not str and right != 0:
+                        stack[-1] = left / right
+                    else:
+                        stack[-1] = self._slow_binary(bytecode, pc, op, left, right)
+
+                elif op == PRINT_ITEM:
+                    line.append(pop())
+
+                elif op == PRINT_LAST:
+                    if line:
+                        line.append(pop())
+                        write(" ".join(map(str, line)) + "\n")
+                        line.clear()
+                    else:
+                        write(f"{pop()}\n")
+
+                elif op == UNARY_NEG:
+                    value = stack[-1]
+                    if type(value) is not str:
+                        stack[-1] = -value
+                    else:
+                        stack[-1] = wrap(value).neg(*bytecode.spans[(pc - 2) >> 1]).value
+        except Error:
+            # Values of a failing `say` printed so far still show.
+            if line:
+                write(" ".join(map(str, line)) + " ")
+            raise
+
+    def _slow_binary(self, bytecode, pc, op, left, right):
+        span = bytecode.spans[(pc - 2) >> 1]
+        return getattr(wrap(left), SLOW_BINARY_OPS[op])(wrap(right), *span).value
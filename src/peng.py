@@ -1,71 +1,462 @@
+import importlib
+import sys
+
 from core.errors import Error
-from core.interpreter import Interpreter, Context, SymbolTable
-from core.lexer import Lexer
-from core.parser import Parser
+from core.interpreter import Context, SymbolTable
+from core.output import DEFAULT_BUFFER_SIZE, FdSink, StreamSink
+from core.resolver import Resolver
 
 __version__ = "0.1.0"
 
-def compile_and_run(code_source, file_name):
+# Engine name -> (module, class). Only the engine a run uses is imported,
+# see `get_engine`.
+ENGINES = {
+    "tree": ("core.interpreter", "Interpreter"),
+    "vm": ("core.vm", "VM"),
+    "python": ("core.transpiler", "PythonEngine"),
+}
+
+def get_engine(name):
+    """Returns the engine class registered in ENGINES as `name`."""
+    module, class_name = ENGINES[name]
+    return getattr(__import__(module, fromlist=[class_name]), class_name)
+
+def parse(code_source, file_name, use_cache=False, profiler=None, lex_jobs=None):
+    """Returns `(source, ast)` for `code_source`, or a lexing/parsing Error.
+
+    With `use_cache`, `file_name` must be the script's path: the AST is then
+    loaded from its `.pengc` file when that matches the code, and stored
+    there after parsing when not. The phases are timed on `profiler`, a
+    core.profiler.Profiler, if given. With `lex_jobs`, the code is lexed on
+    that many worker processes (see `Lexer.lex_parallel`), for huge scripts.
+    """
+    if use_cache:
+        from core import cache
+        ast = cache.load(file_name, code_source, __version__)
+        if profiler is not None:
+            profiler.mark("load cache")
+        if ast is not None:
+            from core.position_manager import Source
+            return Source(code_source, file_name), ast
+
+    # Not needed on a cache hit, and the lexer brings in `re`.
+    from core.lexer import Lexer
+    from core.parser import Parser
+
     lexer = Lexer(code_source, file_name)
-    tokens = lexer.lex()
+    tokens = lexer.lex() if lex_jobs is None else lexer.lex_parallel(lex_jobs)
+    if profiler is not None:
+        profiler.mark("lex")
     if isinstance(tokens, Error):
-        print(tokens)
-        return
+        return tokens
+
+    ast = Parser(tokens, lexer.source).parse()
+    if profiler is not None:
+        profiler.mark("parse")
+    if isinstance(ast, Error):
+        return ast
+
+    if use_cache:
+        cache.store(file_name, code_source, __version__, ast)
+        if profiler is not None:
+            profiler.mark("store cache")
+    return lexer.source, ast
+
+def compile(code_source, file_name="<string>", engine="tree", opt_level=1):
+    """Compiles `code_source` to a core.program.Program, to run it any number of times.
+
+    For embedding: errors in the code are raised (PENG `Error`s), not
+    printed. Variables read before they are assigned become the Program's
+    inputs, given values by `Program.run(bindings)`.
+    """
+    from core.optimizer import Optimizer
+    from core.program import Program
+
+    parsed = parse(code_source, file_name)
+    if isinstance(parsed, Error):
+        raise parsed
+    source, ast = parsed
+
+    context = Context("<main>")
+    context.symbol_table = SymbolTable()
+    resolver = Resolver(context, source, inputs=True)
+    ast = resolver.resolve(ast)
+    if isinstance(ast, Error):
+        raise ast
+    ast = Optimizer(opt_level).optimize(ast)
 
-    parser = Parser(tokens)
-    ast = parser.parse()
+    engine_class = get_engine(engine)
+    compiled = engine_class(source).compile(ast)
+    return Program(source, engine_class, compiled, context.symbol_table, resolver.inputs)
+
+def make_engine(engine, source, output, profiler=None, budget=None):
+    """An instance of the `engine` named, profiling for `profiler` if given and the engine can.
+
+    A `budget` (see core.budget) is only enforced by the tree engine, any
+    other raises ValueError.
+    """
+    if budget is not None and engine != "tree":
+        raise ValueError("budgets can only be used on the tree engine")
+    if profiler is not None and engine == "tree":
+        from core.profiler import ProfilingInterpreter
+        return ProfilingInterpreter(source, output, profiler, budget)
+    if budget is not None:
+        return get_engine(engine)(source, output, budget=budget)
+    return get_engine(engine)(source, output)
+
+def compile_and_run(code_source, file_name, engine="tree", opt_level=1, opt_stats=False, output=None, use_cache=False,
+                    profiler=None, budget=None, lex_jobs=None):
+    """Runs `code_source`, returns the Error that stopped it (already printed) or None.
+
+    Output goes to the `output` sink, by default a buffered one on stdout. It
+    is flushed before returning, but not closed. See `parse` for `use_cache`,
+    `profiler` and `lex_jobs`, `make_engine` for `budget`.
+    """
+    parsed = parse(code_source, file_name, use_cache, profiler, lex_jobs)
+    if isinstance(parsed, Error):
+        print(parsed)
+        return parsed
+    source, ast = parsed
+
+    context = Context("<main>")
+    context.symbol_table = SymbolTable()
+    ast = Resolver(context, source).resolve(ast)
+    if profiler is not None:
+        profiler.mark("resolve")
     if isinstance(ast, Error):
         print(ast)
-        return
+        return ast
+
+    if opt_level or opt_stats:
+        from core.optimizer import Optimizer
+        optimizer = Optimizer(opt_level)
+        ast = optimizer.optimize(ast)
+        if opt_stats:
+            print(optimizer.stats(), file=sys.stderr)
+        if profiler is not None:
+            profiler.mark("optimize")
 
+    if output is None:
+        output = StreamSink(sys.stdout)
+    interpreter = make_engine(engine, source, output, profiler, budget)
+    try:
+        res = interpreter.interpret(ast, context)
+    finally:
+        output.flush()
+    if profiler is not None:
+        profiler.mark("run")
+    if res.error:
+        print(res.error)
+    return res.error
+
+def run_stream(stream, file_name, engine="tree", opt_level=1, opt_stats=False, output=None, profiler=None, budget=None):
+    """Like `compile_and_run`, reading and running `stream` one statement at a time.
+
+    The phases all take turns per statement, a `profiler` times them as one.
+    """
+    from core.lexer import Lexer
+    from core.optimizer import Optimizer
+    from core.parser import Parser
+
+    lexer = Lexer.from_stream(stream, file_name)
+    parser = Parser(lexer.iter_tokens(), lexer.source)
     context = Context("<main>")
     context.symbol_table = SymbolTable()
-    interpreter = Interpreter()
-    interpreter.interpret(ast, context)
+    resolver = Resolver(context, lexer.source)
+    optimizer = Optimizer(opt_level)
+    statements = (
+        statement if isinstance(statement, Error) else resolver.resolve(statement)
+        for statement in parser.iter_parse()
+    )
+    statements = (
+        statement if isinstance(statement, Error) else optimizer.optimize(statement)
+        for statement in statements
+    )
+
+    if output is None:
+        output = StreamSink(sys.stdout)
+    interpreter = make_engine(engine, lexer.source, output, profiler, budget)
+    try:
+        res = interpreter.interpret_stream(statements, context)
+    finally:
+        output.flush()
+        if opt_stats:
+            print(optimizer.stats(), file=sys.stderr)
+    if profiler is not None:
+        profiler.mark("lex, parse and run")
+    if res.error:
+        print(res.error)
+    return res.error
+
+def run_file(file_name, engine="tree", opt_level=1, use_cache=True, budget=None):
+    """Runs the script `file_name` for a batch (`-j`), see `core.batch.run_batch`.
+
+    Returns its exit status, the first line of its error or None, and its
+    output, with the error where `peng.py file_name` would have printed it.
+    """
+    import contextlib
+    import io
+
+    text = io.StringIO()
+    try:
+        with open(file_name, "r") as f:
+            code_source = f.read()
+    except OSError as exc:
+        return 1, f"can't open file: {exc.strerror}", ""
+
+    error = None
+    if code_source:
+        with contextlib.redirect_stdout(text):
+            error = compile_and_run(code_source, file_name, engine, opt_level, False, StreamSink(text, None), use_cache,
+                                    budget=budget)
+    return (1, str(error).partition("\n")[0], text.getvalue()) if error else (0, None, text.getvalue())
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise ValueError(text)
+    return value
+
+def buffer_size_arg(text):
+    if text == "exit":
+        return text
+    size = int(text)
+    if size < 0:
+        raise ValueError(text)
+    return size
 
 def get_help():
     print("Text version of help coming soon for now please go to https://bluten.tk/project/peng/wiki")
 
-if __name__ == "__main__":
+class Options:
+    """The command line options, all at their defaults.
 
+    `peng.py file.peng` needs nothing else, so it is run without importing
+    and building the argparse parser (see `parse_args`).
+    """
+    engine = "tree"
+    opt_level = 1
+    opt_stats = False
+    stream = False
+    no_cache = False
+    output = None
+    buffer_size = None
+    file = "-"
+    files = ()
+    jobs = None
+    lex_jobs = None
+    manifest = None
+    output_dir = None
+    serve = None
+    client = None
+    timeout = None
+    profile = None
+    max_nodes = None
+    max_string_length = None
+    max_output = None
+    time_limit = None
+
+    def __init__(self, **options):
+        self.__dict__.update(options)
+
+def make_arg_parser():
     import argparse
-    import os
 
     arg_parser = argparse.ArgumentParser(
         description="A Interpreter for the language PENG(Programming ENGlish) by BluTen",
-        usage="peng.py [options] [file | -]",
+        usage="peng.py [options] [file | -]\n       peng.py [options] [-j N] [--manifest FILE] [--output-dir DIR] file ...",
         epilog="For more information, visit https://bluten.tk/project/peng/wiki"
     )
 
     arg_parser.add_argument("--version", action="version", version=f"%(prog)s v{__version__}")
-    arg_parser.add_argument("file", nargs="?", default="-", help="The file to run. Defaults to stdin.")
-
-    args = arg_parser.parse_args()
-
-    if args.file == "-":
-        print(f"PENG v{__version__}\n\nREPL Coming Soon!\n\n")
-        # while True:
-        #     try:
-        #         code_source = input(">>> ")
-        #         if code_source == "":
-        #             continue
-        #         elif code_source == "exit":
-        #             break
-        #         elif code_source == "help":
-        #             get_help()
-        #         else: 
-        #             compile_and_run(code_source)
-        #     except EOFError:
-        #         break
-        #     except KeyboardInterrupt:
-        #         print("\nKeyboardInterrupt")
-    else:
-        source = None
+    arg_parser.add_argument("--engine", choices=ENGINES, default="tree", help="Execution engine: tree walker (default), bytecode VM or transpiled Python.")
+    arg_parser.add_argument("--opt-level", type=int, choices=(0, 1, 2), default=1, help="0: no AST optimization, 1: fold constants (default), 2: also simplify identities.")
+    arg_parser.add_argument("--opt-stats", action="store_true", help="Report how many nodes the optimizer folded on stderr.")
+    arg_parser.add_argument("--stream", action="store_true", help="Read, parse and run the file one statement at a time.")
+    arg_parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the parsed script in __pengcache__/.")
+    arg_parser.add_argument("--output", metavar="FILE", help="Write the program's output to FILE instead of stdout.")
+    arg_parser.add_argument("--buffer-size", type=buffer_size_arg, metavar="SIZE", help=f"Characters of output collected before they are written: 0 writes every line, 'exit' writes everything at the end. Defaults to 0 on a terminal, {DEFAULT_BUFFER_SIZE} otherwise.")
+    arg_parser.add_argument("--profile", action="store_const", const="text", help="Report the time spent per phase, source line and node type on stderr.")
+    arg_parser.add_argument("--profile-json", dest="profile", action="store_const", const="json", help="Like --profile, as JSON.")
+    arg_parser.add_argument("--max-nodes", type=positive_int, metavar="N", help="Stop a script after it evaluated N AST nodes (tree engine).")
+    arg_parser.add_argument("--max-string-length", type=positive_int, metavar="N", help="Stop a script making a string of more than N characters (tree engine).")
+    arg_parser.add_argument("--max-output", type=positive_int, metavar="N", help="Stop a script writing more than N characters of output (tree engine).")
+    arg_parser.add_argument("--time-limit", type=float, metavar="SECONDS", help="Stop a script still running after SECONDS (tree engine).")
+    arg_parser.add_argument("--serve", metavar="SOCKET", help="Stay running and run the scripts that --client sends to the Unix socket SOCKET.")
+    arg_parser.add_argument("--client", metavar="SOCKET", help="Run the script on the --serve process listening on SOCKET, passing it the other options, stdin and stdout.")
+    arg_parser.add_argument("--timeout", type=float, metavar="SECONDS", help="With --serve or --client: kill a script still running after SECONDS.")
+    arg_parser.add_argument("-j", "--jobs", type=positive_int, metavar="N", help="Run the files as a batch on N worker processes.")
+    arg_parser.add_argument("--lex-jobs", type=positive_int, metavar="N", help="Lex a huge script on N worker processes, in chunks of whole lines.")
+    arg_parser.add_argument("--manifest", metavar="FILE", help="Also run the files listed in FILE, one per line (- for stdin).")
+    arg_parser.add_argument("--output-dir", metavar="DIR", help="In a batch, write each file's output to DIR/<file>.out instead of stdout.")
+    arg_parser.add_argument("files", nargs="*", metavar="file", help="The file to run, defaults to stdin. Several files are run as a batch, where glob patterns are expanded.")
+    return arg_parser
+
+def parse_args(argv):
+    """Returns the Options for `argv`, the arguments after the script name."""
+    if not argv:
+        return Options()
+    if len(argv) == 1 and (argv[0] == "-" or not argv[0].startswith("-")):
+        return Options(file=argv[0], files=argv)
+    args = make_arg_parser().parse_args(argv, Options())
+    if args.files:
+        args.file = args.files[0]
+    return args
+
+def preload():
+    """Imports what runs only load when they need it, see `--serve`."""
+    for module in ("argparse", "core.cache", "core.lexer", "core.optimizer", "core.position_manager", "core.profiler"):
+        importlib.import_module(module)
+
+    for name in ENGINES:
+        get_engine(name)
+
+def client_args(argv):
+    """Splits `argv` into the --client socket, the --timeout and the server's arguments.
+
+    Returns None if `argv` has no (well-formed) --client option. The server
+    checks the other arguments, so a client starts without argparse.
+    """
+    path = timeout = None
+    forwarded = []
+    args = iter(argv)
+    try:
+        for arg in args:
+            option, equals, value = arg.partition("=")
+            if option not in ("--client", "--timeout"):
+                forwarded.append(arg)
+                continue
+            if not equals:
+                value = next(args)
+            if option == "--client":
+                path = value
+            else:
+                timeout = float(value)
+    except (StopIteration, ValueError):
+        return None
+    if path is None:
+        return None
+    return path, timeout, forwarded
+
+def make_budget(args):
+    """The core.budget.Budget for the limits in `args`, or None when there are none."""
+    limits = (args.max_nodes, args.max_string_length, args.max_output, args.time_limit)
+    if all(limit is None for limit in limits):
+        return None
+    if args.engine != "tree":
+        make_arg_parser().error("--max-nodes, --max-string-length, --max-output and --time-limit need --engine tree")
+    from core.budget import Budget
+    return Budget(*limits)
+
+def report_profile(profiler, profile_format):
+    if profiler is not None:
+        print(profiler.to_json() if profile_format == "json" else profiler.report(), file=sys.stderr)
+
+def main(argv):
+    """Runs the command line `argv` (without the script name), exits on errors."""
+    import os
 
+    prog = os.path.basename(sys.argv[0])
+    client = client_args(argv)
+    if client is not None:
+        from core.client import request
+        path, timeout, forwarded = client
         try:
-            with open(args.file, "r") as f:
-                source = f.read()
-            if source != "":
-                compile_and_run(source, args.file)
-        except FileNotFoundError:
-            print(f"{arg_parser.prog}: can't open file '{os.path.abspath(args.file)}': [Errno 2] No such file or directory")
+            status, error = request(path, forwarded, timeout)
+        except OSError as exc:
+            print(f"{prog}: can't reach the server on '{path}': {exc.strerror or exc}", file=sys.stderr)
+            sys.exit(1)
+        if error:
+            print(f"{prog}: {error}", file=sys.stderr)
+        sys.exit(status)
+
+    args = parse_args(argv)
+
+    if args.serve:
+        from core import daemon
+        # The forked children inherit it all, instead of each importing it.
+        preload()
+        try:
+            daemon.serve(args.serve, main, args.timeout)
+        except OSError as exc:
+            print(f"{prog}: can't serve on '{args.serve}': {exc.strerror or exc}", file=sys.stderr)
+            sys.exit(1)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if args.output is None:
+        interactive = sys.stdout.isatty()
+    else:
+        try:
+            output_fd = os.open(args.output, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        except OSError as exc:
+            make_arg_parser().error(f"can't open output file '{args.output}': {exc.strerror}")
+        interactive = os.isatty(output_fd)
+
+    if args.buffer_size is None:
+        size = 0 if interactive else DEFAULT_BUFFER_SIZE
+    else:
+        size = None if args.buffer_size == "exit" else args.buffer_size
+
+    if args.output is None:
+        output = StreamSink(sys.stdout, size)
+    else:
+        output = FdSink(output_fd, size, close_fd=True)
+
+    budget = make_budget(args)
+    profiler = None
+    if args.profile:
+        from core.profiler import Profiler
+        profiler = Profiler()
+
+    try:
+        if args.jobs or args.manifest or len(args.files) > 1:
+            if profiler is not None or args.lex_jobs:
+                make_arg_parser().error("--profile and --lex-jobs run a single script, not a batch")
+            from functools import partial
+            from core.batch import expand, run_batch
+            try:
+                files = expand(args.files, args.manifest)
+            except OSError as exc:
+                make_arg_parser().error(f"can't read manifest '{args.manifest}': {exc.strerror}")
+            run = partial(run_file, engine=args.engine, opt_level=args.opt_level, use_cache=not args.no_cache,
+                          budget=budget)
+            if run_batch(files, run, args.jobs or 1, output, args.output_dir, initializer=preload):
+                sys.exit(1)
+        elif args.file == "-" and not sys.stdin.isatty():
+            error = run_stream(sys.stdin, "<stdin>", args.engine, args.opt_level, args.opt_stats, output, profiler, budget)
+            report_profile(profiler, args.profile)
+            if error:
+                sys.exit(1)
+        elif args.file == "-":
+            if profiler is not None or budget is not None:
+                make_arg_parser().error("--profile and budgets need a script, there is none in the REPL")
+            from core.repl import Repl
+            repl = Repl(get_engine(args.engine), args.opt_level, output)
+            repl.run(f"PENG v{__version__}, type help for help.")
+        else:
+            source = None
+            error = None
+
+            try:
+                with open(args.file, "r") as f:
+                    if args.stream:
+                        error = run_stream(f, args.file, args.engine, args.opt_level, args.opt_stats, output, profiler,
+                                           budget)
+                    else:
+                        source = f.read()
+                if source:
+                    error = compile_and_run(source, args.file, args.engine, args.opt_level, args.opt_stats, output,
+                                            not args.no_cache, profiler, budget, args.lex_jobs)
+            except FileNotFoundError:
+                print(f"{prog}: can't open file '{os.path.abspath(args.file)}': [Errno 2] No such file or directory")
+            else:
+                report_profile(profiler, args.profile)
+            if error:
+                sys.exit(1)
+    finally:
+        output.close()
+
+if __name__ == "__main__":
+    main(sys.argv[1:])